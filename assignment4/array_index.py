@@ -0,0 +1,73 @@
+"""
+Shared base of the numpy-backed indexes (link_graph.LinkGraph, date_timeline.DateTimeline)
+
+Both index items named by strings (article titles, page urls), interned to
+integer ids, in numpy arrays. Changes are collected per id and merged into the
+arrays on `commit`, and the arrays are saved as .npy files next to a text file
+of the names, and memory-mapped when loaded.
+"""
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TypeVar
+
+import numpy as np
+
+Index = TypeVar("Index", bound="ArrayIndex")
+
+
+class ArrayIndex(ABC):
+    """Names interned to ids, and numpy arrays saved as .npy files
+
+    Subclasses set `arrays` to the names of their array attributes, `names_file` to the
+    file the names are saved in, and must implement `commit`, merging `_pending` into the arrays.
+    """
+
+    arrays: tuple[str, ...] = ()
+    names_file = "names.txt"
+
+    def __init__(self):
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        # rows added since the last commit, by id, replacing the committed ones
+        self._pending: dict[int, np.ndarray] = {}
+
+    def intern(self, name: str) -> int:
+        """Integer id of a name, assigning a new one if needed"""
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Merge the rows added since the last commit into the arrays"""
+
+    def save(self, directory: str | Path) -> None:
+        """Write the index to a directory, as one .npy file per array and a text file of the names"""
+        self.commit()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        # write to temporary files first, the current arrays may be mapped from these files
+        for name in self.arrays:
+            tmp_path = directory / f"{name}.tmp.npy"
+            np.save(tmp_path, getattr(self, name))
+            os.replace(tmp_path, directory / f"{name}.npy")
+        tmp_path = directory / f"{self.names_file}.tmp"
+        tmp_path.write_text("".join(name + "\n" for name in self.names), encoding="utf-8")
+        os.replace(tmp_path, directory / self.names_file)
+
+    @classmethod
+    def load(cls: type[Index], directory: str | Path, mmap: bool = True) -> Index:
+        """Open an index written by `save`, with the arrays memory-mapped unless mmap=False"""
+        directory = Path(directory)
+        index = cls()
+        mmap_mode = "r" if mmap else None
+        for name in cls.arrays:
+            setattr(index, name, np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+        index.names = (directory / cls.names_file).read_text(encoding="utf-8").splitlines()
+        index.ids = {name: name_id for name_id, name in enumerate(index.names)}
+        return index
@@ -0,0 +1,77 @@
+"""
+Benchmark of drawing the medal charts of many sports
+
+Compares a new pyplot figure per sport (the old plot_medal_stats) with
+render_medal_charts, which reuses one figure per process.
+
+Run from the assignment4 directory:
+
+    python benchmarks/bench_charts.py [n_sports] [workers]
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+assignment4 = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(assignment4))
+
+from fetch_olympic_statistics import medal_types, render_medal_charts, scandinavian_countries  # noqa: E402
+
+
+def pyplot_charts(matrix: pd.DataFrame, output_parent: Path) -> None:
+    """A new pyplot figure for every sport, like plot_medal_stats used to draw"""
+    countries = list(matrix.columns.unique(level=0))
+    index = np.arange(len(countries))
+    bar_width = 0.25
+    for sport, row in matrix.iterrows():
+        plt.figure(figsize=(10, 6))
+        for i, medal in enumerate(medal_types):
+            plt.bar(index + i * bar_width, [row[(country, medal)] for country in countries], bar_width, label=medal)
+        plt.xlabel("Countries")
+        plt.ylabel("Medals")
+        plt.title(f"{sport} Medals by Scandinavian Countries")
+        plt.xticks(index + bar_width, countries)
+        plt.legend()
+        plt.tight_layout()
+        plt.savefig(output_parent / f"{sport}_medal_ranking.png")
+        plt.close()
+
+
+def main(n_sports: int = 36, workers: int = 0) -> None:
+    rng = np.random.default_rng(0)
+    sports = [f"Sport {i}" for i in range(n_sports)]
+    matrix = pd.DataFrame(
+        rng.integers(0, 30, size=(n_sports, len(scandinavian_countries) * len(medal_types))),
+        index=pd.Index(sports, name="sport"),
+        columns=pd.MultiIndex.from_product([scandinavian_countries, medal_types]),
+    )
+
+    runs = {
+        "pyplot, new figure per sport": lambda out: pyplot_charts(matrix, out),
+        "render_medal_charts": lambda out: render_medal_charts(matrix, out),
+        f"render_medal_charts, workers={workers}": lambda out: render_medal_charts(matrix, out, workers=workers),
+        "render_medal_charts, multi-panel svg": lambda out: render_medal_charts(
+            matrix, out, fmt="svg", multi_panel=True
+        ),
+    }
+    print(f"{n_sports} sports, {len(scandinavian_countries)} countries")
+    for name, run in runs.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            tic = time.perf_counter()
+            run(Path(tmp))
+            seconds = time.perf_counter() - tic
+        print(f"{name:<40} {seconds:7.2f}s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,89 @@
+"""
+Microbenchmark for extracting links from a page with filter_urls
+
+Compares the original find_urls/find_articles (patterns compiled inside the
+functions, a second set to strip #fragments and a third pass for articles)
+with the current single-pass version with module level patterns and the
+memoized href resolution.
+
+Run from the assignment4 directory:
+
+    python benchmarks/bench_filter_urls.py
+"""
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from pathlib import Path
+from urllib.parse import urljoin
+
+assignment4 = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(assignment4))
+
+from filter_urls import find_articles, find_img_src, find_urls  # noqa: E402
+
+
+def find_urls_before(html: str, base_url: str = "https://en.wikipedia.org") -> set[str]:
+    """find_urls as it was before the patterns were hoisted"""
+    anchor_tags = re.compile(r'href="([^"]+)"', flags=re.IGNORECASE)
+    matches = re.findall(anchor_tags, html)
+
+    urls = set()
+    for match in matches:
+        if match.startswith("//"):
+            protocol = base_url.split("://")[0]
+            urls.add(f"{protocol}:{match}")
+        elif match.startswith("https://") or match.startswith("http://"):
+            urls.add(match)
+        elif match.startswith("/"):
+            urls.add(urljoin(base_url, match))
+
+    return {url.split('#')[0] for url in urls}
+
+
+def find_articles_before(html: str, base_url: str = "https://en.wikipedia.org") -> set[str]:
+    """find_articles as it was before the patterns were hoisted"""
+    urls = find_urls_before(html, base_url=base_url)
+    article_pattern = re.compile(r"^https?://[a-z]{2,3}\.wikipedia\.org/wiki/([^:#]*)$", re.IGNORECASE)
+    return {url for url in urls if article_pattern.match(url)}
+
+
+def find_img_src_before(html: str) -> set[str]:
+    """find_img_src as it was before the patterns were hoisted"""
+    img_pat = re.compile(r"<img[^>]+>", flags=re.IGNORECASE)
+    src_pat = re.compile(r'src="([^"]+)"', flags=re.IGNORECASE)
+    src_set = set()
+    for img_tag in img_pat.findall(html):
+        match = src_pat.search(img_tag)
+        if match:
+            src_set.add(match.group(1))
+    return src_set
+
+
+def per_page_ms(func, html: str, number: int) -> float:
+    """Best per-call time in milliseconds"""
+    times = timeit.repeat(lambda: func(html), number=number, repeat=5)
+    return min(times) / number * 1e3
+
+
+def main(number: int = 200) -> None:
+    html = (assignment4 / "optionalargument.txt").read_text(encoding="utf-8")
+    assert find_urls(html) == find_urls_before(html)
+    assert find_articles(html) == find_articles_before(html)
+    assert find_img_src(html) == find_img_src_before(html)
+
+    print(f"optionalargument.txt: {len(html) / 1024:.0f} kB, {len(find_urls(html))} urls")
+    print(f"{'':15} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>8}")
+    for name, before, after in [
+        ("find_urls", find_urls_before, find_urls),
+        ("find_articles", find_articles_before, find_articles),
+        ("find_img_src", find_img_src_before, find_img_src),
+    ]:
+        t_before = per_page_ms(before, html, number)
+        t_after = per_page_ms(after, html, number)
+        print(f"{name:15} {t_before:12.3f} {t_after:12.3f} {t_before / t_after:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
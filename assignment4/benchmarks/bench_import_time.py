@@ -0,0 +1,85 @@
+"""
+Benchmark of the time it takes to import the assignment modules
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+which reports the time spent importing every module it pulls in.
+
+Run from the assignment4 directory:
+
+    python benchmarks/bench_import_time.py [module ...]
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+assignment4 = Path(__file__).parent.parent.absolute()
+
+modules = ["filter_urls", "html_parsing", "requesting_urls", "find_anniversaries", "fetch_olympic_statistics"]
+
+# dependencies that should only be imported when they are used
+heavy_modules = ["matplotlib", "numpy", "pandas", "bs4"]
+
+
+def import_times(module: str) -> tuple[int, dict[str, int]]:
+    """Time it takes to import a module in a fresh interpreter
+
+    Parameters:
+        module (str): name of the module to import
+    Returns:
+        total, imports (tuple[int, dict[str, int]]): cumulative microseconds of `import module`,
+            and of each module it imports directly
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=assignment4,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # lines look like 'import time:      self [us] |  cumulative | imported package',
+    # with the name indented by nesting level, and a package listed after everything it imports
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 0 and name == module:
+            return int(cumulative), imports
+        if depth == 0:
+            # imported at startup, or by an earlier top-level import
+            imports = {}
+        elif depth == 1:
+            imports[name] = int(cumulative)
+    raise RuntimeError(f"{module} is not in the -X importtime output")
+
+
+def loaded_modules(module: str) -> set[str]:
+    """Names of all the modules loaded after `import module`, in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print(' '.join(sys.modules))"],
+        cwd=assignment4,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def main(modules: list[str]) -> None:
+    for module in modules:
+        total, imports = import_times(module)
+        loaded = loaded_modules(module)
+        heavy = [name for name in heavy_modules if name in loaded]
+        print(f"{module:<28} {total / 1000:8.1f} ms   heavy imports: {', '.join(heavy) or 'none'}")
+        for name, us in sorted(imports.items(), key=lambda item: item[1], reverse=True)[:3]:
+            print(f"    {name:<24} {us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or modules)
@@ -0,0 +1,61 @@
+"""
+Benchmark of the BeautifulSoup parser backends on saved pages
+
+Times parsing each saved page with every installed parser backend,
+and checks that the extraction functions give the same results on all of them.
+
+Run from the assignment4 directory:
+
+    python benchmarks/bench_parsers.py [saved_page ...]
+
+Saved pages are files as written by get_html(url, output=...), with the url
+on the first line. Defaults to optionalargument.txt.
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+import timeit
+from pathlib import Path
+
+assignment4 = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(assignment4))
+
+from find_anniversaries import extract_anniversaries  # noqa: E402
+from html_parsing import make_soup, parser_modules  # noqa: E402
+from fetch_olympic_statistics import parse_country_page  # noqa: E402
+
+
+def load_saved_page(path: Path) -> tuple[str, str]:
+    """Read (url, html) from a file written by get_html(..., output=path)"""
+    url, _, html = path.read_text(encoding="utf-8").partition("\n")
+    return url, html
+
+
+def main(paths: list[Path], number: int = 10) -> None:
+    parsers = [
+        parser
+        for parser, module in parser_modules.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+    for path in paths:
+        url, html = load_saved_page(path)
+        print(f"{path.name}: {url} ({len(html) / 1024:.0f} kB)")
+
+        results = {}
+        for parser in parsers:
+            seconds = min(timeit.repeat(lambda: make_soup(html, parser), number=number, repeat=3))
+            print(f"  {parser:12} {seconds / number * 1e3:8.1f} ms per parse")
+            results[parser] = (
+                extract_anniversaries(html, "January", parser),
+                parse_country_page(html, url, parser),
+            )
+
+        reference = results[parsers[0]]
+        for parser in parsers[1:]:
+            assert results[parser] == reference, f"{parser} gives different results than {parsers[0]}"
+
+
+if __name__ == "__main__":
+    paths = [Path(arg) for arg in sys.argv[1:]] or [assignment4 / "optionalargument.txt"]
+    main(paths)
@@ -6,7 +6,14 @@ parsing dates from wikipedia
 
 from __future__ import annotations
 
+import bisect
+import itertools
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator
 
 # create array with all names of months
 month_names = [
@@ -25,6 +32,18 @@ month_names = [
 ]
 
 
+# month name or number -> zero-padded month number, e.g. 'september' and '9' -> '09'
+month_numbers = {}
+for number, name in enumerate(month_names, start=1):
+    month_numbers[name.lower()] = f"{number:02}"
+    month_numbers[str(number)] = month_numbers[f"{number:02}"] = f"{number:02}"
+
+# day number -> zero-padded day number, e.g. '2' and '02' -> '02'
+day_numbers = {}
+for number in range(1, 32):
+    day_numbers[str(number)] = day_numbers[f"{number:02}"] = f"{number:02}"
+
+
 def get_date_patterns() -> tuple[str, str, str]:
     """Return strings containing regex pattern for year, month, day
     arguments:
@@ -32,15 +51,15 @@ def get_date_patterns() -> tuple[str, str, str]:
     return:
         year, month, day (tuple): Containing regular expression patterns for each field
     """
-    raise NotImplementedError("remove me to begin task")
 
     # Regex to capture days, months and years with numbers
+    # ([0-9] rather than \d, which also matches digits of other scripts in str patterns)
     # year should accept a 4-digit number between at least 1000-2029
-    year = r"(?P<year>...)"
+    year = r"(?P<year>1[0-9]{3}|20[0-2][0-9])"
     # month should accept month names or month numbers
-    month = r"(?P<month>...)"
+    month = r"(?P<month>(?i:" + "|".join(month_names) + r")|1[0-2]|0?[1-9])"
     # day should be a number, which may or may not be zero-padded
-    day = r"(?P<day>...)"
+    day = r"(?P<day>[12][0-9]|3[01]|0?[1-9])"
 
     return year, month, day
 
@@ -56,13 +75,7 @@ def convert_month(s: str) -> str:
     returns:
         month_number (str) : month number as zero-padded string
     """
-    raise NotImplementedError("remove me to begin task")
-    # If already digit do nothing
-    if s.isdigit():
-        ...
-
-    # Convert to number as string
-    ...
+    return month_numbers[s.lower()]
 
 
 def zero_pad(n: str):
@@ -73,42 +86,323 @@ def zero_pad(n: str):
     You don't need to use this function,
     but you may find it useful.
     """
-    raise NotImplementedError("remove me to begin task")
-    ...
+    return n.zfill(2)
 
 
-def find_dates(text: str, output: str | None = None) -> list:
-    """Finds all dates in a text using reg ex
+def _rename_groups(pattern: str, prefix: str) -> str:
+    """Prefix the names of the groups in a pattern, so it can be used more than once in a regex"""
+    return re.sub(r"\(\?P<(\w+)>", rf"(?P<{prefix}_\1>", pattern)
+
+
+@lru_cache(maxsize=None)
+def date_regex(binary: bool = False) -> tuple[re.Pattern, dict[int, tuple[int, int, int]]]:
+    """The compiled regex finding dates in all the supported formats in one scan
+
+    Every format is a named group of one alternation, with its own year, month and day groups.
 
     arguments:
-        text (string): A string containing html text from a website
-        output (str, Optional) : The file to write the output to if wanted
-    return:
-        results (List): A list with all the dates found
+        binary (bool): compile the regex for bytes instead of str
+    returns:
+        regex, fields (tuple): the compiled regex, and for the group number of each format
+            the group numbers of its year, month and day
     """
-    raise NotImplementedError("remove me to begin task")
     year, month, day = get_date_patterns()
+    month_names_only = r"(?P<month>(?i:" + "|".join(month_names) + "))"
+    # ISO months and days are always two digits
+    iso_month = r"(?P<month>1[0-2]|0[1-9])"
+    iso_day = r"(?P<day>[12][0-9]|3[01]|0[1-9])"
 
-    # Date on format YYYY/MM/DD - ISO
-    ISO = ...
+    # Date on format YYYY-MM-DD - ISO
+    ISO = rf"{year}-{iso_month}-{iso_day}"
 
-    # Date on format DD/MM/YYYY
-    DMY = ...
+    # Date on format DD Month YYYY
+    DMY = rf"{day}\s{month_names_only}\s{year}"
 
-    # Date on format MM/DD/YYYY
-    MDY = ...
+    # Date on format Month DD, YYYY
+    MDY = rf"{month_names_only}\s{day},\s{year}"
 
-    # Date on format YYYY/MM/DD
-    YMD = ...
+    # Date on format YYYY Month DD
+    YMD = rf"{year}\s{month_names_only}\s{day}"
 
     # list with all supported formats
-    formats = ...
-    dates = []
+    formats = {"ISO": ISO, "DMY": DMY, "MDY": MDY, "YMD": YMD}
+
+    alternation = "|".join(f"(?P<{name}>{_rename_groups(pattern, name)})" for name, pattern in formats.items())
+    pattern = rf"\b(?:{alternation})\b"
+    if binary:
+        # \s only matches ASCII whitespace in bytes, so also allow a UTF-8 no-break space,
+        # which wikipedia often puts in dates
+        regex = re.compile(pattern.replace(r"\s", r"(?:\s|\xc2\xa0)").encode("ascii"))
+    else:
+        regex = re.compile(pattern)
+    fields = {
+        regex.groupindex[name]: tuple(regex.groupindex[f"{name}_{field}"] for field in ("year", "month", "day"))
+        for name in formats
+    }
+    return regex, fields
+
+
+def iter_dates(text: str | bytes) -> Iterator[str]:
+    """Yield the dates in a text as 'YYYY/MM/DD', in the order they appear
+
+    The text is scanned once, for all the formats at the same time, see date_regex.
+    Raw bytes, e.g. from get_html(..., as_bytes=True), are scanned without decoding them,
+    and so is a memory-mapped SavedPage.view.
+
+    arguments:
+        text (string | bytes): A string containing html text from a website, or its raw bytes
+    yields:
+        date (str): each date found
+    """
+    regex, fields = date_regex(not isinstance(text, str))
+    for match in regex.finditer(text):
+        yield _match_date(match, fields)
+
+
+def _match_date(match: re.Match, fields: dict[int, tuple[int, int, int]]) -> str:
+    """The date of a match of date_regex, as 'YYYY/MM/DD'"""
+    # the format group is the last to close
+    year, month, day = match.group(*fields[match.lastindex])
+    if isinstance(year, bytes):
+        year, month, day = year.decode("ascii"), month.decode("ascii"), day.decode("ascii")
+    return f"{year}/{month_numbers.get(month) or month_numbers[month.lower()]}/{day_numbers[day]}"
+
 
+def find_dates(text: str | bytes, output: str | None = None) -> list:
+    """Finds all dates in a text using reg ex
+
+    arguments:
+        text (string | bytes): A string containing html text from a website, or its raw bytes
+        output (str, Optional) : The file to write the output to if wanted
+    return:
+        results (List): A list with all the dates found
+    """
     # find all dates in any format in text
-    ...
+    dates = list(iter_dates(text))
+
     # Write to file if wanted
     if output:
-        ...
+        with open(output, "w", encoding="utf-8") as f:
+            f.writelines(date + "\n" for date in dates)
+
+    return dates
+
+
+def _rechunk(chunks: Iterable[str | bytes], chunk_size: int) -> Iterator[str | bytes]:
+    """Join and split text chunks into pieces of chunk_size characters (the last one may be shorter)"""
+    # the pieces are only joined once there is a chunk's worth, and each character
+    # is copied once into the joined buffer and once into its chunk
+    pieces = []
+    buffered = 0
+    for chunk in chunks:
+        pieces.append(chunk)
+        buffered += len(chunk)
+        if buffered < chunk_size:
+            continue
+        buffer = chunk[:0].join(pieces)
+        end = len(buffer) - len(buffer) % chunk_size
+        for start in range(0, end, chunk_size):
+            yield buffer[start : start + chunk_size]
+        pieces = [buffer[end:]]
+        buffered = len(pieces[0])
+    if buffered:
+        yield pieces[0][:0].join(pieces)
+
 
+def _read_chunks(path: str | os.PathLike, chunk_size: int, binary: bool = False) -> Iterator[str | bytes]:
+    """Read a text file in chunks of chunk_size characters, or bytes if binary"""
+    with open(path, "rb") if binary else open(path, encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _documents(source, chunk_size: int, binary: bool = False) -> Iterator[Iterator[str | bytes]]:
+    """Split a source into documents, each an iterator of text chunks
+
+    Consecutive strings are chunks of one continuous text, each path is a document of its own.
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        source = [source]
+    for is_path, items in itertools.groupby(source, key=lambda item: isinstance(item, os.PathLike)):
+        if is_path:
+            for path in items:
+                yield _read_chunks(path, chunk_size, binary)
+        else:
+            yield _rechunk(items, chunk_size)
+
+
+def _windows(
+    documents: Iterable[Iterator[str | bytes]], overlap: int
+) -> Iterator[tuple[str | bytes, int, int, int]]:
+    """Yield (window, start, stop, offset) for every chunk of every document
+
+    The window is the chunk with up to `overlap` characters of the text before and after it,
+    window[start:stop] is the chunk itself, and offset is the position of the window in its document.
+    """
+    for chunks in documents:
+        chunk = next(chunks, None)
+        if chunk is None:
+            continue
+        before = chunk[:0]
+        position = 0
+        while chunk is not None:
+            following = next(chunks, None)
+            after = following[:overlap] if following else chunk[:0]
+            yield before + chunk + after, len(before), len(before) + len(chunk), position - len(before)
+            before = (before + chunk)[-overlap:]
+            position += len(chunk)
+            chunk = following
+
+
+def _scan_window(window: str | bytes, start: int, stop: int, pos: int | None = None) -> list[tuple[int, int, str]]:
+    """(start, end, date) of the matches found scanning a window from pos, up to the chunk's stop
+
+    Without pos, the scan starts at the beginning of the window, one character in
+    if there is context before the chunk, so the character before every match is
+    the same as in the whole text.
+    """
+    regex, fields = date_regex(isinstance(window, bytes))
+    if pos is None:
+        pos = min(start, 1)
+    matches = []
+    for match in regex.finditer(window, pos):
+        if match.start() >= stop:
+            break
+        matches.append((match.start(), match.end(), _match_date(match, fields)))
+    return matches
+
+
+def _chunk_dates(
+    window: str | bytes, start: int, stop: int, resume: int, matches: list[tuple[int, int, str]] | None = None
+) -> tuple[list[str], int]:
+    """The dates a scan of the whole text finds in a chunk, and where that scan goes on after it
+
+    Dates in different formats can overlap ('1999 March 12, 1999' holds two), so which
+    ones the whole scan finds depends on where the previous date it found ended: `resume`.
+    A scan of the window from anywhere else can be out of step with it. `matches` from
+    such a scan, made in parallel before `resume` was known, are only used from the
+    first one the whole scan would also find on, and the chunk is scanned again otherwise.
+
+    arguments:
+        window, start, stop: a window from _windows
+        resume (int): end of the last date found before the chunk, relative to the window (may be negative)
+        matches (list, optional): _scan_window(window, start, stop)
+    returns:
+        dates, resume (tuple[list[str], int]): the dates that start in the chunk,
+            and the end of the last date found so far, relative to the window
+    """
+    # no date starts between resume and the chunk, or the previous chunk would have it,
+    # so the whole scan goes on with the first date starting in the chunk
+    resume = max(resume, start)
+    if matches is not None:
+        first = bisect.bisect_left(matches, resume, key=lambda match: match[0])
+        # in step if the window scan looked for its next date from at or before resume
+        if first == 0 or matches[first - 1][1] <= resume:
+            matches = matches[first:]
+        else:
+            matches = None
+    if matches is None:
+        matches = _scan_window(window, start, stop, resume)
+    if matches:
+        resume = matches[-1][1]
+    return [date for _, _, date in matches], resume
+
+
+def iter_dates_parallel(
+    source: str | bytes | os.PathLike | Iterable[str | bytes | os.PathLike],
+    workers: int | None = None,
+    chunk_size: int = 1 << 20,
+    overlap: int = 64,
+    as_bytes: bool = False,
+) -> Iterator[list[str]]:
+    """Find the dates in a large text or many files, split into chunks scanned in parallel
+
+    Each chunk is scanned with `overlap` characters of context on both sides,
+    and only keeps the dates that start inside it. So a date cut in two by a chunk
+    boundary is found exactly once, as long as the overlap is longer than any date
+    (the longest, like 'September 30, 2000', are under 20 characters).
+    Where dates in different formats overlap, the chunk's dates are lined up with
+    where the previous chunk's last date ended (see _chunk_dates), so the dates are
+    the same as find_dates finds in the whole text.
+
+    arguments:
+        source: the text (str or bytes), a file (as a pathlib.Path), or an iterable of both.
+            Consecutive strings are chunks of one continuous text, for instance the lines
+            of a dump, and every file is a separate document.
+        workers (int, optional): number of processes, 0 for one per core.
+            None or 1 scans in this process.
+        chunk_size (int): number of characters scanned by each task
+        overlap (int): number of characters of context around each chunk
+        as_bytes (bool): scan files as raw bytes, without decoding them
+    yields:
+        dates (list[str]): the dates of each chunk, chunk by chunk in document order
+    """
+    if chunk_size <= overlap:
+        raise ValueError(f"chunk_size ({chunk_size}) must be larger than overlap ({overlap})")
+    windows = _windows(_documents(source, chunk_size, as_bytes), overlap)
+    # end of the last date found, in the current document
+    resume = 0
+
+    if workers is None or workers == 1:
+        for window, start, stop, offset in windows:
+            if offset == 0:
+                resume = 0
+            dates, end = _chunk_dates(window, start, stop, resume - offset)
+            resume = offset + end
+            yield dates
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # a few chunks per process in flight, so a huge source isn't read into memory at once
+        max_pending = 2 * workers
+        pending = deque()
+
+        def finish() -> list[str]:
+            nonlocal resume
+            (window, start, stop, offset), future = pending.popleft()
+            if offset == 0:
+                resume = 0
+            dates, end = _chunk_dates(window, start, stop, resume - offset, future.result())
+            resume = offset + end
+            return dates
+
+        for window in windows:
+            pending.append((window, executor.submit(_scan_window, *window[:3])))
+            if len(pending) >= max_pending:
+                yield finish()
+        while pending:
+            yield finish()
+
+
+def find_dates_parallel(
+    source: str | bytes | os.PathLike | Iterable[str | bytes | os.PathLike],
+    output: str | None = None,
+    workers: int | None = None,
+    chunk_size: int = 1 << 20,
+    overlap: int = 64,
+    as_bytes: bool = False,
+) -> list[str]:
+    """find_dates for corpus-scale text: scanned in chunks, in parallel, see iter_dates_parallel
+
+    arguments:
+        source: the text, a file (as a pathlib.Path), or an iterable of both, see iter_dates_parallel
+        output (str, Optional) : The file to write the output to if wanted, written chunk by chunk
+        workers (int, optional): number of processes, 0 for one per core
+        chunk_size (int): number of characters scanned by each task
+        overlap (int): number of characters of context around each chunk
+        as_bytes (bool): scan files as raw bytes, without decoding them
+    return:
+        results (List): A list with all the dates found, in document order
+    """
+    dates = []
+    f = open(output, "w", encoding="utf-8") if output else None
+    try:
+        for chunk_dates in iter_dates_parallel(source, workers, chunk_size, overlap, as_bytes):
+            dates.extend(chunk_dates)
+            if f is not None:
+                f.writelines(date + "\n" for date in chunk_dates)
+    finally:
+        if f is not None:
+            f.close()
     return dates
@@ -0,0 +1,384 @@
+"""
+Crawling wikipedia articles
+
+A crawler built on find_articles: pages are fetched with get_html by a pool of
+worker threads, and the articles they link to are added to a priority frontier.
+
+- Visited urls are kept in a Bloom filter, so memory stays fixed no matter
+  how many pages are crawled (at the price of skipping a small fraction of
+  urls, see `BloomFilter`).
+- Requests to the same host are spaced at least `delay` seconds apart.
+- The crawl stops at `max_depth` links from the seeds, or after `max_pages` pages.
+- Pages that fail to fetch are put back in the frontier, up to `max_attempts`
+  tries each, and the ones that failed every try are kept in the checkpoint.
+- At most `max_frontier` urls are kept in memory, the rest of the frontier
+  is spilled to an append-only file and read back when the frontier runs low.
+- The frontier and visited set can be checkpointed to disk, and the crawl
+  resumed from the checkpoint after a crash. The visited set is written as a
+  binary file of its own, and only when it has changed.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
+from urllib.parse import urlparse
+
+from filter_urls import find_articles
+from requesting_urls import get_html
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Set membership in a fixed amount of memory
+
+    Never says an added item is missing, but says a missing item is present
+    with probability about `error_rate` once `capacity` items are added.
+
+    Args:
+        capacity (int): number of items the filter is sized for
+        error_rate (float): false positive rate at capacity
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_dict(self, bits: bool = True) -> dict:
+        """The filter as json-able data, without the (large) bit array if bits=False"""
+        data = {"size": self.size, "hashes": self.hashes, "count": self.count}
+        if bits:
+            data["bits"] = base64.b64encode(bytes(self.bits)).decode("ascii")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, bits: bytes | None = None) -> BloomFilter:
+        """The filter saved with to_dict, with the bit array given separately if it isn't in data"""
+        bloom = cls.__new__(cls)
+        bloom.size = data["size"]
+        bloom.hashes = data["hashes"]
+        bloom.count = data["count"]
+        bloom.bits = bytearray(bits if bits is not None else base64.b64decode(data["bits"]))
+        return bloom
+
+
+class HostRateLimiter:
+    """Spaces out requests to the same host by at least `delay` seconds"""
+
+    def __init__(self, delay: float = 1.0):
+        self.delay = delay
+        self._next_time: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str) -> None:
+        """Block until a request to the host of `url` is allowed"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time.get(host, now))
+            self._next_time[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+
+class Crawler:
+    """Crawl wikipedia articles breadth-first (or by a custom priority) from some seed urls
+
+    Args:
+        seeds (Iterable[str]): article urls to start from
+        fetch (Callable[[str], str]): gets the html of a url, get_html by default
+        max_depth (int): follow links at most this many steps from the seeds
+        max_pages (int): stop after this many pages have been fetched
+        workers (int): number of pages fetched at the same time
+        delay (float): minimum seconds between requests to the same host
+        priority (Callable[[str, int], float], optional): priority of a (url, depth),
+            lowest first. The depth by default, i.e. breadth-first.
+        capacity (int): expected number of urls seen, to size the visited set
+        error_rate (float): fraction of urls the visited set may wrongly skip
+        checkpoint (str | Path, optional): file to save the crawl state to.
+            The visited set and the spilled frontier are saved next to it,
+            as <checkpoint>.bloom<n> and <checkpoint>.frontier.
+        checkpoint_every (int): save the checkpoint after this many pages
+        max_attempts (int): times to try fetching a page before giving up on it
+        max_frontier (int): urls of the frontier kept in memory, the others are spilled to disk.
+            Spilled urls are crawled after the ones in memory, so the order is only
+            approximately by priority once the frontier has spilled.
+    """
+
+    def __init__(
+        self,
+        seeds: Iterable[str] = (),
+        fetch: Callable[[str], str] = get_html,
+        max_depth: int = 2,
+        max_pages: int = 1000,
+        workers: int = 8,
+        delay: float = 1.0,
+        priority: Callable[[str, int], float] | None = None,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        checkpoint: str | Path | None = None,
+        checkpoint_every: int = 100,
+        max_attempts: int = 3,
+        max_frontier: int = 100_000,
+    ):
+        self.fetch = fetch
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = workers
+        self.rate_limiter = HostRateLimiter(delay)
+        self.priority = priority or (lambda url, depth: depth)
+        self.visited = BloomFilter(capacity, error_rate)
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.checkpoint_every = checkpoint_every
+        self.max_attempts = max_attempts
+        self.max_frontier = max_frontier
+
+        # heap of (priority, insertion number, depth, url)
+        self.frontier: list[tuple[float, int, int, str]] = []
+        self._counter = 0
+        self.pages = 0
+        self.failed = 0
+        # failed tries of the urls that haven't been fetched yet
+        self.attempts: dict[str, int] = {}
+        # (depth, url) of the pages given up on, to retry on resume
+        self.failed_urls: list[tuple[int, str]] = []
+        # pages being fetched, put back in the frontier in checkpoints
+        self._in_flight: dict[Future, tuple[float, int, int, str]] = {}
+        # frontier entries that didn't fit in memory, one json line each. Lines from
+        # _spill_offset to _spill_size are still to crawl, anything after is left over
+        # from after the last checkpoint of a crashed crawl.
+        self._spill_path = self.checkpoint.with_name(self.checkpoint.name + ".frontier") if self.checkpoint else None
+        self._spill_file: IO[bytes] | None = None
+        self._spill_offset = 0
+        self._spill_size = 0
+        # (file, count) of the last visited set saved
+        self._bloom_saved: tuple[Path, int] | None = None
+
+        for url in seeds:
+            self.enqueue(url, 0)
+
+    def enqueue(self, url: str, depth: int) -> bool:
+        """Add a url to the frontier, unless it has been seen before"""
+        if url in self.visited:
+            return False
+        self.visited.add(url)
+        self._push(url, depth)
+        return True
+
+    def _push(self, url: str, depth: int) -> None:
+        """Add an entry to the frontier, or to the spill file if the frontier is full"""
+        entry = (self.priority(url, depth), self._counter, depth, url)
+        self._counter += 1
+        if len(self.frontier) < self.max_frontier:
+            heapq.heappush(self.frontier, entry)
+            return
+        f = self._spill()
+        f.seek(0, os.SEEK_END)
+        f.write(json.dumps(entry).encode("utf-8") + b"\n")
+        self._spill_size = f.tell()
+
+    def _spill(self) -> IO[bytes]:
+        """The spill file, opened on first use"""
+        if self._spill_file is None:
+            if self._spill_path is None:
+                self._spill_file = tempfile.TemporaryFile()
+            else:
+                self._spill_file = open(self._spill_path, "a+b")
+                # drop what was spilled after the checkpoint we started from
+                self._spill_file.truncate(self._spill_size)
+        return self._spill_file
+
+    def _refill(self) -> None:
+        """Move spilled entries back into the frontier, as many as fit"""
+        if self._spill_offset >= self._spill_size:
+            return
+        f = self._spill()
+        f.seek(self._spill_offset)
+        while len(self.frontier) < self.max_frontier and f.tell() < self._spill_size:
+            self.frontier.append(tuple(json.loads(f.readline())))
+        self._spill_offset = f.tell()
+        heapq.heapify(self.frontier)
+        if self._spill_offset >= self._spill_size:
+            # all read back, start the file over
+            f.truncate(0)
+            self._spill_offset = self._spill_size = 0
+            if self.checkpoint:
+                # the last checkpoint refers to lines that are gone now
+                self.save_checkpoint(self.checkpoint)
+
+    def _fetch(self, url: str) -> str:
+        self.rate_limiter.wait(url)
+        return self.fetch(url)
+
+    def run(self) -> Iterator[tuple[str, set[str]]]:
+        """Crawl, yielding (url, articles linked from it) for every fetched page
+
+        The crawl can be stopped at any time by not consuming the rest of the iterator,
+        `save_checkpoint` then saves what is left to do.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while self.frontier or self._in_flight or self._spill_offset < self._spill_size:
+                if not self.frontier:
+                    self._refill()
+                while (
+                    self.frontier
+                    and len(self._in_flight) < self.workers
+                    and self.pages + len(self._in_flight) < self.max_pages
+                ):
+                    entry = heapq.heappop(self.frontier)
+                    self._in_flight[executor.submit(self._fetch, entry[3])] = entry
+                if not self._in_flight:
+                    break
+
+                done, _ = wait(self._in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = self._in_flight.pop(future)
+                    _, _, depth, url = entry
+                    try:
+                        html = future.result()
+                    except Exception as exc:
+                        self._failed(entry, exc)
+                        continue
+                    self.attempts.pop(url, None)
+
+                    self.pages += 1
+                    parsed = urlparse(url)
+                    articles = find_articles(html, base_url=f"{parsed.scheme}://{parsed.netloc}")
+                    if depth < self.max_depth:
+                        for article in sorted(articles):
+                            self.enqueue(article, depth + 1)
+
+                    if self.checkpoint and self.pages % self.checkpoint_every == 0:
+                        self.save_checkpoint(self.checkpoint)
+                    yield url, articles
+
+        if self.checkpoint:
+            self.save_checkpoint(self.checkpoint)
+
+    def _failed(self, entry: tuple[float, int, int, str], exc: Exception) -> None:
+        """Put a page that failed to fetch back in the frontier, or give up on it after max_attempts"""
+        _, _, depth, url = entry
+        attempts = self.attempts[url] = self.attempts.get(url, 0) + 1
+        if attempts < self.max_attempts:
+            logger.info("Failed to fetch %s (try %d of %d): %s", url, attempts, self.max_attempts, exc)
+            # behind the pages of the same priority, so a flaky page isn't retried right away
+            self._push(url, depth)
+            return
+        logger.warning("Failed to fetch %s after %d tries: %s", url, attempts, exc)
+        del self.attempts[url]
+        self.failed += 1
+        self.failed_urls.append((depth, url))
+
+    def save_checkpoint(self, path: str | Path) -> None:
+        """Save the frontier, visited set and counters, atomically
+
+        The frontier in memory is saved in the checkpoint itself, and the spilled part
+        stays in its file, of which only the position is saved. The visited set is saved
+        to a new file when it has changed, so an interrupted save leaves the old one intact.
+        """
+        path = Path(path)
+        frontier = self.frontier + list(self._in_flight.values())
+        spill = None
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        if self._spill_path is not None and self._spill_path == path.with_name(path.name + ".frontier"):
+            spill = {"file": self._spill_path.name, "offset": self._spill_offset, "size": self._spill_size}
+        elif self._spill_offset < self._spill_size:
+            # not the spill file of this checkpoint, so its entries go in the checkpoint
+            f = self._spill()
+            f.seek(self._spill_offset)
+            frontier += [tuple(json.loads(line)) for line in f.read(self._spill_size - self._spill_offset).splitlines()]
+
+        previous = self._bloom_saved
+        if previous is None or previous[0].parent != path.parent or previous[1] != self.visited.count:
+            generation = 0 if previous is None else int(previous[0].name.rsplit(".bloom", 1)[1]) + 1
+            bloom_path = path.with_name(f"{path.name}.bloom{generation}")
+            tmp_path = bloom_path.with_name(bloom_path.name + ".tmp")
+            tmp_path.write_bytes(self.visited.bits)
+            os.replace(tmp_path, bloom_path)
+            self._bloom_saved = (bloom_path, self.visited.count)
+
+        state = {
+            "frontier": frontier,
+            "counter": self._counter,
+            "pages": self.pages,
+            "failed": self.failed,
+            "attempts": self.attempts,
+            "failed_urls": self.failed_urls,
+            "spill": spill,
+            "visited": {**self.visited.to_dict(bits=False), "bits_file": self._bloom_saved[0].name},
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        if previous is not None and previous[0] != self._bloom_saved[0]:
+            previous[0].unlink(missing_ok=True)
+
+    @classmethod
+    def resume(cls, path: str | Path, retry_failed: bool = True, **kwargs) -> Crawler:
+        """Continue a crawl from a checkpoint, with the same arguments as the constructor (except seeds)
+
+        The pages given up on before are tried again, with a fresh `max_attempts`, unless retry_failed=False.
+        """
+        path = Path(path)
+        kwargs.setdefault("checkpoint", path)
+        crawler = cls(**kwargs)
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        crawler.frontier = [tuple(entry) for entry in state["frontier"]]
+        heapq.heapify(crawler.frontier)
+        crawler._counter = state["counter"]
+        crawler.pages = state["pages"]
+        crawler.failed = state["failed"]
+        crawler.attempts = state.get("attempts", {})
+        crawler.failed_urls = [tuple(entry) for entry in state.get("failed_urls", [])]
+        visited = state["visited"]
+        if "bits_file" in visited:
+            bloom_path = path.with_name(visited["bits_file"])
+            crawler.visited = BloomFilter.from_dict(visited, bloom_path.read_bytes())
+            crawler._bloom_saved = (bloom_path, crawler.visited.count)
+        else:
+            crawler.visited = BloomFilter.from_dict(visited)
+        if state.get("spill"):
+            # carry on with the spill file of the checkpoint
+            crawler._spill_path = path.with_name(state["spill"]["file"])
+            crawler._spill_offset = state["spill"]["offset"]
+            crawler._spill_size = state["spill"]["size"]
+        if retry_failed:
+            for depth, url in crawler.failed_urls:
+                crawler._push(url, depth)
+            crawler.failed -= len(crawler.failed_urls)
+            crawler.failed_urls = []
+        return crawler
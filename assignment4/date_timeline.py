@@ -0,0 +1,145 @@
+"""
+A timeline index of the dates mentioned in scraped pages
+
+The dates found by collect_dates are stored as one sorted `datetime64[D]` array,
+with the id of the page each date was found on in a parallel array. Range queries
+and year/decade histograms are binary searches in the sorted dates, so they take
+about the same time for a thousand dates as for millions. The arrays are saved
+as .npy files and memory-mapped when loaded.
+
+    timeline = DateTimeline()
+    for url, html in pages:
+        timeline.add_page(url, html)
+    timeline.pages_between("1905", "1911")
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+from array_index import ArrayIndex
+from collect_dates import iter_dates
+
+# bin sizes in years for DateTimeline.histogram
+histogram_units = {"year": 1, "decade": 10, "century": 100}
+
+
+def parse_dates(dates: Iterable[str]) -> np.ndarray:
+    """Turn 'YYYY/MM/DD' strings into a datetime64[D] array, with NaT for dates that don't exist
+
+    arguments:
+        dates (Iterable[str]): dates as found by collect_dates.find_dates
+    returns:
+        days (np.ndarray): the dates, in the same order
+    """
+    parts = np.array([date.split("/") for date in dates], dtype=np.int64).reshape(-1, 3)
+    years, months, days = parts.T
+    month_starts = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    result = month_starts.astype("datetime64[D]") + (days - 1)
+    # e.g. 2021/02/30 ends up in March
+    valid = (result.astype("datetime64[M]") == month_starts) & (months >= 1) & (months <= 12) & (days >= 1)
+    result[~valid] = np.datetime64("NaT")
+    return result
+
+
+def _as_day(value: str | int | np.datetime64) -> np.datetime64:
+    """A day from a date, year ('1905'), month ('1905-06') or year number"""
+    return np.datetime64(str(value) if isinstance(value, int) else value, "D")
+
+
+class DateTimeline(ArrayIndex):
+    """Dates mentioned in pages, sorted by date
+
+    Pages are added with `add_page` (or `add_dates`), and become part of the
+    arrays on `commit`. Adding a page that is already in the index replaces its dates.
+    Saved as pages.txt, dates.npy and page_ids.npy, see ArrayIndex.
+    """
+
+    arrays = ("dates", "page_ids")
+    names_file = "pages.txt"
+
+    def __init__(self):
+        super().__init__()
+        self.dates = np.zeros(0, dtype="datetime64[D]")
+        self.page_ids = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def pages(self) -> list[str]:
+        """Page names, by id"""
+        return self.names
+
+    @pages.setter
+    def pages(self, pages: list[str]) -> None:
+        self.names = pages
+
+    def add_dates(self, page: str, dates: Iterable[str]) -> None:
+        """Set the dates mentioned in a page, as 'YYYY/MM/DD' strings. Dates that don't exist are left out."""
+        days = parse_dates(dates)
+        self._pending[self.intern(page)] = days[~np.isnat(days)]
+
+    def add_page(self, page: str, text: str) -> None:
+        """Add the dates found in the text (or html) of a page, see collect_dates.find_dates"""
+        self.add_dates(page, iter_dates(text))
+
+    def commit(self) -> None:
+        """Merge the pages added since the last commit into the sorted arrays"""
+        if not self._pending:
+            return
+        replaced = np.fromiter(self._pending, dtype=np.int32)
+        keep = ~np.isin(self.page_ids, replaced)
+        dates = np.concatenate([self.dates[keep], *self._pending.values()])
+        page_ids = np.concatenate(
+            [
+                self.page_ids[keep],
+                *(np.full(len(days), page_id, dtype=np.int32) for page_id, days in self._pending.items()),
+            ]
+        )
+        # by date, then by page
+        order = np.lexsort((page_ids, dates))
+        self.dates = dates[order]
+        self.page_ids = page_ids[order]
+        self._pending = {}
+
+    def mentions(
+        self, start: str | int | np.datetime64, end: str | int | np.datetime64
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The dates from `start` up to (not including) `end`, and the ids of their pages
+
+        arguments:
+            start, end: days, months ('1905-06'), years ('1905') or year numbers.
+                Dates in 1905-1910 are mentions(1905, 1911).
+        returns:
+            dates, page_ids (tuple[np.ndarray, np.ndarray]): sorted by date
+        """
+        self.commit()
+        first, last = np.searchsorted(self.dates, [_as_day(start), _as_day(end)])
+        return self.dates[first:last], self.page_ids[first:last]
+
+    def pages_between(self, start: str | int | np.datetime64, end: str | int | np.datetime64) -> list[str]:
+        """The pages mentioning a date from `start` up to (not including) `end`, see `mentions`"""
+        _, page_ids = self.mentions(start, end)
+        return [self.pages[page_id] for page_id in np.unique(page_ids).tolist()]
+
+    def histogram(self, unit: str = "decade") -> tuple[np.ndarray, np.ndarray]:
+        """Number of date mentions per year, decade or century
+
+        returns:
+            starts, counts (tuple[np.ndarray, np.ndarray]): the first year of each bin, and its count,
+                from the earliest to the latest bin with any dates
+        """
+        if unit not in histogram_units:
+            raise ValueError(f"{unit!r} is not a valid unit, must be one of {list(histogram_units)}")
+        self.commit()
+        size = histogram_units[unit]
+        if not len(self.dates):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first, last = (self.dates[[0, -1]].astype("datetime64[Y]").astype(np.int64) + 1970) // size
+        starts = np.arange(first, last + 2) * size
+        # the dates are sorted, so the count of each bin is the distance between its edges
+        edges = (starts - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+        counts = np.diff(np.searchsorted(self.dates, edges))
+        return starts[:-1], counts
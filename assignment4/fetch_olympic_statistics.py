@@ -6,14 +6,24 @@ collecting olympic statistics from wikipedia
 
 from __future__ import annotations
 
-from pathlib import Path
-import requests
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field
+from functools import partial
+import math
+import os
 import re
-import matplotlib.pyplot as plt
+import sys
 from pathlib import Path
-from typing import List
-import numpy as np
+from typing import TYPE_CHECKING, List
+
+from html_parsing import get_parser, make_soup, parse_many
+from requesting_urls import get_html, get_html_many
+
+# matplotlib, numpy, pandas and bs4 take a long time to import,
+# so they are imported in the functions that use them
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from bs4 import BeautifulSoup
 
 
 # Countries to submit statistics for
@@ -22,8 +32,22 @@ scandinavian_countries = ["Norway", "Sweden", "Denmark"]
 # Summer sports to submit statistics for
 summer_sports = ["Sailing", "Athletics", "Handball", "Football", "Cycling", "Archery"]
 
+medal_types = ["Gold", "Silver", "Bronze"]
+
+# columns of the tidy medal dataset, one row per count
+dataset_columns = ["country", "season", "sport", "medal", "count"]
+# the sport of the rows with the summer/winter gold totals
+all_sports = "All"
+
 
-def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path) -> None:
+def report_scandi_stats(
+    url: str,
+    sports_list: list[str],
+    work_dir: str | Path,
+    parser: str | None = None,
+    workers: int | None = None,
+    dataset: str | Path | None = None,
+) -> None:
     """
     Given the url, extract and display following statistics for the Scandinavian countries:
 
@@ -37,6 +61,11 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
         url (str) : url to the 'All-time Olympic Games medal table' wiki page
         sports_list (list[str]) : list of summer Olympic games sports to display statistics for
         work_dir (str | Path) : (absolute) path to your current working directory
+        parser (str, optional) : parser backend to parse the pages with, see html_parsing.get_parser
+        workers (int, optional) : number of processes to parse the country pages in, see html_parsing.parse_many
+        dataset (str | Path, optional) : medal dataset file (.parquet, .feather or .csv). It is loaded
+                          if it exists, instead of scraping the pages from `url`, and saved there otherwise.
+                          Only the Scandinavian countries in it are used, and all three must be there.
 
     Returns:
         None
@@ -52,24 +81,32 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
     stats_dir = work_dir / "olympic_games_results"
     stats_dir.mkdir(parents=True, exist_ok=True)
 
-    country_dict = get_scandi_stats(url)
+    # all the stats are queries on the medal dataset, which is scraped once
+    if dataset is not None and Path(dataset).exists():
+        medals = load_dataset(dataset)
+        missing = [country for country in scandinavian_countries if country not in set(medals["country"])]
+        if missing:
+            raise ValueError(f"The dataset {dataset} has no medals for {missing}, remove it to scrape them from {url}")
+        medals = medals[medals["country"].isin(scandinavian_countries)]
+    else:
+        medals = build_medal_dataset(url, scandinavian_countries, parser, workers)
+        if dataset is not None:
+            save_dataset(medals, dataset)
 
     # Plot 
-    plot_scandi_stats(country_dict, stats_dir)
+    plot_scandi_stats(medals, stats_dir)
 
     best_in_sport = []
 
-    for sport in sports_list:
-        results = {}
-        for country in scandinavian_countries:
-            country_url = country_dict[country]['url']
-            results[country] = get_sport_stats(country_url, sport)
-        
-        plot_medal_stats(scandinavian_countries, results, sport, stats_dir)
+    matrix = medal_matrix(medals, sports_list)
+    # the best countries in every sport and medal type, in one go
+    best = find_best_countries(matrix)
+
+    render_medal_charts(matrix, stats_dir, workers=workers)
 
-        # Find the best country in sport by Gold
-        best_country = find_best_country_in_sport(results)
-        best_in_sport.append((sport, best_country))
+    for i, sport in enumerate(sports_list):
+        # Best country in sport by Gold
+        best_in_sport.append((sport, best["Gold"].iloc[i]))
 
     md_table_path = stats_dir / "best_of_sport_by_Gold.md"
     with md_table_path.open('w') as f:
@@ -82,6 +119,8 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
 
 def get_scandi_stats(
     url: str,
+    parser: str | None = None,
+    workers: int | None = None,
 ) -> dict[str, dict[str, str | dict[str, int]]]:
     """Given the url, extract the urls for the Scandinavian countries,
        as well as number of gold medals acquired in summer and winter Olympic games
@@ -89,6 +128,8 @@ def get_scandi_stats(
 
     Parameters:
       url (str): url to the 'All-time Olympic Games medal table' wiki page
+      parser (str, optional): parser backend to parse the pages with, see html_parsing.get_parser
+      workers (int, optional): number of processes to parse the country pages in, see html_parsing.parse_many
 
     Returns:
       country_dict: dictionary of the form:
@@ -105,121 +146,411 @@ def get_scandi_stats(
         with the tree keys "Norway", "Denmark", "Sweden".
     """
 
-    response = requests.get(url)
-    html = response.text
-    soup = BeautifulSoup(html, 'html.parser')
+    return get_country_stats(url, scandinavian_countries, source="page", parser=parser, workers=workers)
+
+
+# columns of the 'List of NOCs with medals' table:
+# team | summer games, gold, silver, bronze, total | winter games, gold, silver, bronze, total | combined ...
+summer_gold_column = 2
+winter_gold_column = 7
+
+# country name without the "(NOC)" code and [footnote] markers
+country_name_pattern = re.compile(r"([^\(\[]+)")
+
+
+def _table_count(cell) -> int | None:
+    """Medal count in a cell of the all-time table, None if it can't be read"""
+    text = cell.text.strip().replace(",", "")
+    return int(text) if text.isdigit() else None
+
+
+def parse_medal_table(html: str, parser: str | None = None) -> dict[str, dict[str, str | dict[str, int | None]]]:
+    """Read the url and summer/winter gold medals of every NOC from the 'List of NOCs with medals' table
+
+    Parameters:
+        - html (str) : the html of the 'All-time Olympic Games medal table' wiki page
+        - parser (str, optional) : parser backend, see html_parsing.get_parser
+
+    Returns:
+        - countries (dict) : the countries in table order, in the same format as get_scandi_stats.
+                          Counts that can't be read from the table are None.
+    """
+    soup = make_soup(html, parser)
     table = soup.find('table', {'class': 'wikitable'})
     base_url = "https://en.wikipedia.org"
 
-    rows = table.find_all('tr')
+    countries = {}
+    for row in table.find_all('tr'):
+        cols = row.find_all('td')
+        if not cols:
+            continue
+        link = cols[0].find('a')
+        country_name_match = country_name_pattern.match(cols[0].text.strip())
+        if link is None or not country_name_match:
+            continue
+        has_counts = len(cols) > winter_gold_column
+        countries[country_name_match.group(1).strip()] = {
+            "url": base_url + link['href'],
+            "medals": {
+                "Summer": _table_count(cols[summer_gold_column]) if has_counts else None,
+                "Winter": _table_count(cols[winter_gold_column]) if has_counts else None,
+            },
+        }
+    return countries
 
-    country_dict = {}
 
-    for row in rows:
-        cols = row.find_all('td')
-        if cols:
-            country_name_match = re.match(r"([^\(\[]+)", cols[0].text)
-            if country_name_match:
-                country_name = country_name_match.group(1).strip()
-                if country_name in scandinavian_countries:
-                    print(f"Country_name in scandinavian_countries : {country_name}:")
-                    country_url = base_url + cols[0].find('a')['href']
-                    print(f"URL for {country_name}: {country_url}")
-
-                    country_response = requests.get(country_url)
-                    country_html = country_response.text
-                    country_soup = BeautifulSoup(country_html, 'html.parser')
-
-                    # Find the table with summer gold medals count
-                    summer_sport_section_id = 'Medals_by_summer_sport' if country_name != 'Sweden' else 'Medals_by_Summer_Sport'
-                    summer_sport_section = country_soup.find('span', id=summer_sport_section_id)
-                    print(f"summer_sport_section {summer_sport_section}")
-                    summer_gold = 0
-                    if summer_sport_section:
-                        summer_table = summer_sport_section.find_next('table')
-                        summer_gold_row = summer_table.find('tr', class_='sortbottom')
-                        if summer_gold_row:
-                            summer_gold = int(summer_gold_row.find_all('td')[0].text.strip())
-                    print(f"summer_gold {summer_gold}")
-
-                    # Find for winter sport medals
-                    winter_sport_section_id = 'Medals_by_winter_sport' if country_name != 'Sweden' else 'Medals_by_Winter_Sport'
-                    winter_sport_section = country_soup.find('span', id=winter_sport_section_id)
-                    winter_gold = 0
-                    if winter_sport_section:
-                        winter_table = winter_sport_section.find_next('table')
-                        winter_gold_row = winter_table.find('tr', class_='sortbottom')
-                        if winter_gold_row:
-                            winter_gold = int(winter_gold_row.find_all('td')[0].text.strip())
-                    print(f"winter_gold {winter_gold}")
-
-                    country_dict[country_name] = {
-                        "url": country_url,
-                        "medals": {
-                            "Summer": summer_gold,
-                            "Winter": winter_gold,
-                        },
-                    }
+def get_country_stats(
+    url: str,
+    countries: list[str] | str = "all",
+    source: str = "table",
+    sports: list[str] | None = None,
+    parser: str | None = None,
+    workers: int | None = None,
+    pages: dict[tuple[str, str], CountryPage] | None = None,
+) -> dict[str, dict]:
+    """Get the summer and winter gold medals of any set of countries, in one pass over the all-time table.
+
+    The table page is fetched and parsed once. Country pages are only fetched when they are needed:
+    for every country with source="page" or when `sports` are asked for, otherwise only for the
+    countries whose row in the table can't be read. They are fetched concurrently, once per page,
+    see `get_country_pages`.
+
+    Note that the totals in the all-time table and on the country pages don't always agree,
+    e.g. medals won as part of mixed teams are only counted in the table.
 
-    return country_dict
+    Parameters:
+        - url (str) : url to the 'All-time Olympic Games medal table' wiki page
+        - countries (list[str] | str) : names of the countries as in the table, or "all" for every NOC
+        - source (str) : where to take the summer/winter gold totals from, "table" or "page"
+        - sports (list[str], optional) : also get the medals in these summer sports, from the country pages
+        - parser (str, optional) : parser backend to parse the pages with, see html_parsing.get_parser
+        - workers (int, optional) : number of processes to parse the country pages in, see html_parsing.parse_many
+        - pages (dict, optional) : parsed country pages to reuse and add to, see get_country_pages
+
+    Returns:
+        - country_dict (dict) : in the format of get_scandi_stats, with an extra "sports" entry
+                          {"Sailing" : {"Gold" : x, "Silver" : y, "Bronze" : z}, ...} for each country
+                          when `sports` are given
+    """
+    if source not in {"table", "page"}:
+        raise ValueError(f"{source!r} is not a valid source, must be 'table' or 'page'")
+
+    table = parse_medal_table(get_html(url), parser)
+    if countries == "all":
+        countries = list(table)
+    unknown = [country for country in countries if country not in table]
+    if unknown:
+        raise ValueError(f"Countries not found in the medal table: {unknown}")
+
+    need_pages = [
+        country
+        for country in countries
+        if source == "page" or sports or None in table[country]["medals"].values()
+    ]
+    page_urls = [table[country]["url"] for country in need_pages]
+    pages = dict(zip(need_pages, get_country_pages(page_urls, parser, workers, pages)))
+
+    country_dict = {}
+    for country in countries:
+        medals = dict(table[country]["medals"])
+        page = pages.get(country)
+        if page is not None and (source == "page" or medals["Summer"] is None):
+            medals["Summer"] = page.summer_gold
+        if page is not None and (source == "page" or medals["Winter"] is None):
+            medals["Winter"] = page.winter_gold
+        country_dict[country] = {"url": table[country]["url"], "medals": medals}
+        if sports:
+            country_dict[country]["sports"] = {sport: page.sport_stats(sport) for sport in sports}
 
+    return country_dict
 
 
-def get_sport_stats(country_url: str, sport: str) -> dict[str, int]:
+def get_sport_stats(country_url: str, sport: str, parser: str | None = None) -> dict[str, int]:
     """Given the url to country specific performance page, get the number of gold, silver, and bronze medals
       the given country has acquired in the requested sport in summer Olympic games.
 
+    The page is only downloaded and parsed the first time a country is asked for,
+    see `get_country_pages`.
+
     Parameters:
         - country_url (str) : url to the country specific Olympic performance wiki page
         - sport (str) : name of the summer Olympic sport in interest. Should be used to filter rows in the table.
+        - parser (str, optional) : parser backend to parse the page with, see html_parsing.get_parser
 
     Returns:
         - medals (dict[str, int]) : dictionary of number of medal acquired in the given sport by the country
                           Format:
                           {"Gold" : x, "Silver" : y, "Bronze" : z}
     """
-    response = requests.get(country_url)
-    html = response.text
-    soup = BeautifulSoup(html, 'html.parser')
+    return get_country_pages([country_url], parser)[0].sport_stats(sport)
+
+
+@dataclass
+class CountryPage:
+    """Medal statistics parsed from a `<Country>_at_the_Olympics` page.
+
+    Attributes:
+        url (str) : url of the country page
+        summer_gold (int) : total number of gold medals in the summer Olympic games
+        winter_gold (int) : total number of gold medals in the winter Olympic games
+        sports (dict[str, dict[str, int]]) : the 'Medals by summer sport' table, in page order
+                          Format:
+                          {"Sailing" : {"Gold" : x, "Silver" : y, "Bronze" : z}, ...}
+    """
+
+    url: str
+    summer_gold: int = 0
+    winter_gold: int = 0
+    sports: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def sport_stats(self, sport: str) -> dict[str, int]:
+        """Medals in the first sport whose name contains `sport` (case-insensitive)"""
+        sport_pattern = re.compile(re.escape(sport), re.I)
+        for name, medals in self.sports.items():
+            if sport_pattern.search(name):
+                return dict(medals)
+        return {"Gold": 0, "Silver": 0, "Bronze": 0}
+
+
+# parsed country pages by (url, parser), so repeated get_sport_stats calls fetch each page once
+_country_pages: dict[tuple[str, str], CountryPage] = {}
+
+
+def clear_country_pages() -> None:
+    """Forget the country pages parsed so far, so they are fetched again on next use"""
+    _country_pages.clear()
+
+
+def get_country_pages(
+    country_urls: list[str],
+    parser: str | None = None,
+    workers: int | None = None,
+    pages: dict[tuple[str, str], CountryPage] | None = None,
+) -> list[CountryPage]:
+    """Get the parsed country pages for the given urls.
+
+    Pages that haven't been seen before are fetched concurrently and parsed,
+    the rest are served from memory.
+
+    Parameters:
+        - country_urls (list[str]) : urls to country specific Olympic performance wiki pages
+        - parser (str, optional) : parser backend to parse the pages with, see html_parsing.get_parser
+        - workers (int, optional) : number of processes to parse the pages in, see html_parsing.parse_many
+        - pages (dict, optional) : the pages parsed so far, by (url, parser), which new pages are added to.
+                          By default the pages are kept for the rest of the process,
+                          until clear_country_pages is called.
+
+    Returns:
+        - pages (list[CountryPage]) : the parsed pages, in the same order as country_urls
+    """
+    parser = get_parser(parser)
+    if pages is None:
+        pages = _country_pages
+    missing = list(dict.fromkeys(url for url in country_urls if (url, parser) not in pages))
+    if missing:
+        parsed = parse_many(
+            partial(parse_country_page, parser=parser),
+            get_html_many(missing),
+            missing,
+            workers=workers,
+        )
+        pages.update(((url, parser), page) for url, page in zip(missing, parsed))
+    return [pages[country_url, parser] for country_url in country_urls]
+
+
+def _medal_count(cell) -> int:
+    """Medal count in a table cell, 0 if it isn't a number"""
+    text = cell.text.strip()
+    return int(text) if text.isdigit() else 0
+
+
+def _total_gold(soup: BeautifulSoup, section_id: str) -> int:
+    """Number of gold medals in the total row of the table following the section heading"""
+    # the capitalization of the heading ids differs between countries
+    section = soup.find('span', id=re.compile(f"^{section_id}$", re.I))
+    if section:
+        table = section.find_next('table')
+        total_row = table.find('tr', class_='sortbottom')
+        if total_row:
+            return int(total_row.find_all('td')[0].text.strip())
+    return 0
+
+
+def parse_country_page(html: str, country_url: str = "", parser: str | None = None) -> CountryPage:
+    """Parse a `<Country>_at_the_Olympics` page into a CountryPage.
+
+    Parameters:
+        - html (str) : the html of the country page
+        - country_url (str) : url of the country page
+        - parser (str, optional) : parser backend, see html_parsing.get_parser
+
+    Returns:
+        - page (CountryPage) : summer/winter gold totals and the medals in each summer sport
+    """
+    soup = make_soup(html, parser)
+
+    page = CountryPage(
+        url=country_url,
+        summer_gold=_total_gold(soup, 'Medals_by_summer_sport'),
+        winter_gold=_total_gold(soup, 'Medals_by_winter_sport'),
+    )
 
     # Using regex
     table_headers = soup.find_all('span', string=re.compile('Medals by summer sport', re.I))
-    print(f"table_headers {table_headers}")
-    
-    if not table_headers:
-        return {"Gold": 0, "Silver": 0, "Bronze": 0}
-    
-    medals = {"Gold": 0, "Silver": 0, "Bronze": 0}
-    sport_found = False
-    
     for header in table_headers:
         table = header.find_parent().find_next_sibling('table')
-        if table:
-            rows = table.find_all('tr')
-            sport_pattern = re.compile(re.escape(sport), re.I)
-            print(f"sport_pattern {sport_pattern}")
-            for row in rows[1:]:  
-                header_cell = row.find('th')
-                if not header_cell:
-                    continue
-                sport_link = header_cell.find('a')
-                if sport_link and sport_pattern.search(sport_link.text):
-                    sport_found = True
-                    # td
-                    medals_cells = header_cell.find_next_siblings('td')
-                    medals["Gold"] = int(medals_cells[0].text.strip() if medals_cells[0].text.strip().isdigit() else 0)
-                    medals["Silver"] = int(medals_cells[1].text.strip() if medals_cells[1].text.strip().isdigit() else 0)
-                    medals["Bronze"] = int(medals_cells[2].text.strip() if medals_cells[2].text.strip().isdigit() else 0)
-                    break
-    
-    if not sport_found:
-        return {"Gold": 0, "Silver": 0, "Bronze": 0}
-    
-    return medals
+        if not table:
+            continue
+        for row in table.find_all('tr')[1:]:
+            header_cell = row.find('th')
+            if not header_cell:
+                continue
+            sport_link = header_cell.find('a')
+            medals_cells = header_cell.find_next_siblings('td')
+            if sport_link and len(medals_cells) >= 3:
+                page.sports[sport_link.text] = {
+                    "Gold": _medal_count(medals_cells[0]),
+                    "Silver": _medal_count(medals_cells[1]),
+                    "Bronze": _medal_count(medals_cells[2]),
+                }
+
+    return page
+
+
+def medal_dataset(country_dict: dict[str, dict], pages: list[CountryPage] | None = None) -> pd.DataFrame:
+    """Turn country stats into a tidy medal dataset, with one row per medal count.
+
+    Parameters:
+        - country_dict (dict) : summer/winter gold totals, as returned by get_country_stats
+        - pages (list[CountryPage], optional) : the parsed page of each country, in the same order,
+                          to add the medals in every summer sport
+
+    Returns:
+        - dataset (pd.DataFrame) : with the columns country, season, sport, medal and count.
+                          The summer/winter gold totals have the sport "All", the sports
+                          of each country are in page order.
+    """
+    import pandas as pd
+
+    rows = []
+    for i, (country, stats) in enumerate(country_dict.items()):
+        for season in ("Summer", "Winter"):
+            rows.append((country, season, all_sports, "Gold", stats["medals"][season]))
+        if pages is not None:
+            for sport, medals in pages[i].sports.items():
+                for medal in medal_types:
+                    rows.append((country, "Summer", sport, medal, medals[medal]))
+    dataset = pd.DataFrame(rows, columns=dataset_columns)
+    return dataset.astype({"count": "int64"})
+
+
+def build_medal_dataset(
+    url: str,
+    countries: list[str] | str = scandinavian_countries,
+    parser: str | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """Scrape the medal dataset of some countries: their gold totals, and the full table of summer sports.
+
+    Parameters:
+        - url (str) : url to the 'All-time Olympic Games medal table' wiki page
+        - countries (list[str] | str) : names of the countries, or "all", see get_country_stats
+        - parser (str, optional) : parser backend to parse the pages with, see html_parsing.get_parser
+        - workers (int, optional) : number of processes to parse the country pages in, see html_parsing.parse_many
+
+    Returns:
+        - dataset (pd.DataFrame) : see medal_dataset
+    """
+    # the pages parsed in this run, so a new dataset always has fresh pages
+    pages = {}
+    country_dict = get_country_stats(url, countries, source="page", parser=parser, workers=workers, pages=pages)
+    # already parsed by get_country_stats, so no new downloads
+    country_pages = get_country_pages([stats["url"] for stats in country_dict.values()], parser, pages=pages)
+    return medal_dataset(country_dict, country_pages)
+
+
+def save_dataset(dataset: pd.DataFrame, path: str | Path) -> None:
+    """Save a medal dataset as .parquet, .feather or .csv, by the file suffix
+
+    Parquet and Feather need pyarrow (`pip install pyarrow`).
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        dataset.to_parquet(path, index=False)
+    elif path.suffix == ".feather":
+        dataset.to_feather(path)
+    elif path.suffix == ".csv":
+        dataset.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Can't save a dataset as {path.suffix!r}, must be .parquet, .feather or .csv")
+
+
+def load_dataset(path: str | Path) -> pd.DataFrame:
+    """Load a medal dataset saved with save_dataset"""
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix == ".parquet":
+        dataset = pd.read_parquet(path)
+    elif path.suffix == ".feather":
+        dataset = pd.read_feather(path)
+    elif path.suffix == ".csv":
+        # keep_default_na, so a country or sport called e.g. "NA" stays a string
+        dataset = pd.read_csv(path, keep_default_na=False)
+    else:
+        raise ValueError(f"Can't load a dataset from {path.suffix!r}, must be .parquet, .feather or .csv")
+    return dataset[dataset_columns].astype({"count": "int64"})
+
+
+def dataset_countries(dataset: pd.DataFrame) -> list[str]:
+    """The countries in a medal dataset, in order"""
+    return list(dict.fromkeys(dataset["country"]))
+
+
+def gold_totals(dataset: pd.DataFrame) -> pd.DataFrame:
+    """Summer and winter gold medals of each country in a medal dataset
+
+    Returns:
+        - totals (pd.DataFrame) : indexed by country, with the columns Summer and Winter
+    """
+    totals = dataset[(dataset["sport"] == all_sports) & (dataset["medal"] == "Gold")]
+    table = totals.pivot_table(index="country", columns="season", values="count", aggfunc="sum")
+    return table.reindex(index=dataset_countries(dataset), columns=["Summer", "Winter"]).fillna(0).astype(int)
+
+
+def sport_medals(dataset: pd.DataFrame, sport: str) -> pd.DataFrame:
+    """Medals of each country in a summer sport, from a medal dataset
+
+    Like CountryPage.sport_stats, the first sport of each country whose name contains
+    `sport` (case-insensitive) is used, and countries without it get zeros.
+
+    Returns:
+        - medals (pd.DataFrame) : indexed by country, with the columns Gold, Silver and Bronze
+    """
+    summer = dataset[(dataset["season"] == "Summer") & (dataset["sport"] != all_sports)]
+    matches = summer[summer["sport"].str.contains(sport, case=False, regex=False)]
+    first_sport = matches.groupby("country", sort=False)["sport"].transform("first")
+    matches = matches[matches["sport"] == first_sport]
+    table = matches.pivot_table(index="country", columns="medal", values="count", aggfunc="sum")
+    return table.reindex(index=dataset_countries(dataset), columns=medal_types).fillna(0).astype(int)
+
+
+def _is_frame(obj) -> bool:
+    """Check if obj is a pandas DataFrame, without importing pandas"""
+    # if pandas hasn't been imported, obj can't be a DataFrame
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(obj, pandas.DataFrame)
+
+
+def _medal_dict(results: dict[str, dict[str, int]] | pd.DataFrame) -> dict[str, dict[str, int]]:
+    """Medals by country as a dictionary, from a dictionary or a (country x medal) DataFrame"""
+    if _is_frame(results):
+        return results.to_dict("index")
+    return results
 
 
 def find_best_country_in_sport(
-    results: dict[str, dict[str, int]], medal: str = "Gold"
+    results: dict[str, dict[str, int]] | pd.DataFrame, medal: str = "Gold"
 ) -> str:
     """Given a dictionary with medal stats in a given sport for the Scandinavian countries, return the country
         that has received the most of the given `medal`.
@@ -230,6 +561,7 @@ def find_best_country_in_sport(
                          "Sweden" : {"Gold" : 1, ....},
                          "Denmark" : ...
                         }
+                        or a DataFrame indexed by country with a column per medal, see sport_medals
         - medal (str) : medal type to compare for. Valid parameters: ["Gold" | "Silver" |"Bronze"]. Should be used as a key
                           to the medal dictionary.
     Returns:
@@ -241,6 +573,7 @@ def find_best_country_in_sport(
     valid_medals = {"Gold", "Silver", "Bronze"}
     if medal not in valid_medals:
         raise ValueError(f"{medal} is invalid parameter for ranking, must be in {valid_medals}")
+    results = _medal_dict(results)
 
     best_countries = []
     highest_medal_count = 0
@@ -269,8 +602,95 @@ def find_best_country_in_sport(
 
 
 
+def medal_matrix(dataset: pd.DataFrame, sports: list[str] | None = None) -> pd.DataFrame:
+    """Sport x country x medal counts from a medal dataset
+
+    Parameters:
+        - dataset (pd.DataFrame) : a medal dataset, see medal_dataset
+        - sports (list[str], optional) : the summer sports, matched like in sport_medals.
+                          Every sport in the dataset, by its exact name, if not given.
+
+    Returns:
+        - matrix (pd.DataFrame) : indexed by sport, with a (country, medal) column for each country and medal
+    """
+    import pandas as pd
+
+    columns = pd.MultiIndex.from_product([dataset_countries(dataset), medal_types], names=["country", "medal"])
+    if sports is None:
+        summer = dataset[(dataset["season"] == "Summer") & (dataset["sport"] != all_sports)]
+        matrix = summer.pivot_table(
+            index="sport", columns=["country", "medal"], values="count", aggfunc="sum", sort=False
+        )
+    elif sports:
+        matrix = pd.DataFrame(
+            [sport_medals(dataset, sport).stack() for sport in sports],
+            index=pd.Index(sports, name="sport"),
+        )
+    else:
+        matrix = pd.DataFrame(index=pd.Index([], name="sport"), columns=columns)
+    return matrix.reindex(columns=columns).fillna(0).astype(int)
+
+
+def find_best_countries(
+    counts: np.ndarray | pd.DataFrame,
+    countries: list[str] | None = None,
+    sports: list[str] | None = None,
+    medals: list[str] = medal_types,
+) -> pd.DataFrame:
+    """find_best_country_in_sport for every sport and medal type at once.
+
+    The leaders of all the sports and medals are found in one pass over the array,
+    and each distinct set of leaders is formatted once, with the same rules as
+    find_best_country_in_sport: 'Norway', 'Norway/Sweden' for ties (sorted by name),
+    and 'None' if all or none of the countries lead.
+
+    Parameters:
+        - counts (np.ndarray | pd.DataFrame) : medal counts, either an array of shape
+                          (sports, countries, medals), or a DataFrame like from medal_matrix,
+                          which also gives the countries, sports and medals
+        - countries (list[str]) : names of the countries, for an array
+        - sports (list[str], optional) : names of the sports, for an array. Numbered from 0 if not given.
+        - medals (list[str]) : names of the medal types, for an array
+
+    Returns:
+        - best (pd.DataFrame) : the best country(ies), indexed by sport with a column per medal
+    """
+    import numpy as np
+    import pandas as pd
+
+    if _is_frame(counts):
+        countries = list(counts.columns.unique(level=0))
+        medals = list(counts.columns.unique(level=1))
+        sports = list(counts.index)
+        counts = counts.reindex(columns=pd.MultiIndex.from_product([countries, medals]))
+        counts = counts.to_numpy().reshape(len(sports), len(countries), len(medals))
+    counts = np.asarray(counts)
+    n_sports, n_countries, n_medals = counts.shape
+    if sports is None:
+        sports = list(range(n_sports))
+
+    if n_countries == 0:
+        best = np.full((n_sports, n_medals), "None", dtype=object)
+    else:
+        # sort the countries by name, so the names of each set of leaders join in order
+        order = np.argsort(np.asarray(countries, dtype=str), kind="stable")
+        names = np.asarray(countries, dtype=object)[order]
+        counts = counts[:, order, :]
+        leaders = counts == counts.max(axis=1, keepdims=True)
+        # one row of leading countries per (sport, medal)
+        leaders = np.moveaxis(leaders, 1, 2).reshape(-1, n_countries)
+        patterns, inverse = np.unique(leaders, axis=0, return_inverse=True)
+        labels = np.array(["/".join(names[pattern]) for pattern in patterns], dtype=object)
+        # all the countries lead, which includes none of them having any medals
+        if n_countries > 1:
+            labels[patterns.sum(axis=1) == n_countries] = "None"
+        best = labels[inverse.reshape(-1)].reshape(n_sports, n_medals)
+
+    return pd.DataFrame(best, index=pd.Index(sports, name="sport"), columns=pd.Index(medals, name="medal"))
+
+
 def plot_scandi_stats(
-    country_dict: dict[str, dict[str, str | dict[str, int]]],
+    country_dict: dict[str, dict[str, str | dict[str, int]]] | pd.DataFrame,
     output_parent: str | Path | None = None,
 ) -> None:
     """Plot the number of gold medals in summer and winter games for each of the scandi countries as bars.
@@ -280,38 +700,50 @@ def plot_scandi_stats(
                             gold medals from 'List of NOCs with medals' table.
                             Format:
                             {"country_name": {"Summer" : x, "Winter" : y}}
+                            or a medal dataset, see medal_dataset
       output_parent (str | Path) : parent file path to save the plot in
     Returns:
       None
     """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
     bar_width = 0.35
-    countries = list(country_dict.keys())
-    summer_gold = [country_dict[country]['medals']['Summer'] for country in countries]
-    winter_gold = [country_dict[country]['medals']['Winter'] for country in countries]
+    if _is_frame(country_dict):
+        totals = gold_totals(country_dict)
+        countries = list(totals.index)
+        summer_gold = totals['Summer'].tolist()
+        winter_gold = totals['Winter'].tolist()
+    else:
+        countries = list(country_dict.keys())
+        summer_gold = [country_dict[country]['medals']['Summer'] for country in countries]
+        winter_gold = [country_dict[country]['medals']['Winter'] for country in countries]
 
     index = range(len(countries))
 
-    plt.figure(figsize=(10, 6))
-    plt.bar(index, summer_gold, bar_width, label='Summer Gold')
-    plt.bar([i + bar_width for i in index], winter_gold, bar_width, label='Winter Gold')
+    # the object-oriented Agg API doesn't touch pyplot's global state, so it is thread-safe
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    ax.bar(index, summer_gold, bar_width, label='Summer Gold')
+    ax.bar([i + bar_width for i in index], winter_gold, bar_width, label='Winter Gold')
 
-    plt.xlabel('Countries')
-    plt.ylabel('Gold Medals')
-    plt.title('Gold Medals in Summer and Winter Olympics')
-    plt.xticks([i + bar_width / 2 for i in index], countries)
-    plt.legend()
+    ax.set_xlabel('Countries')
+    ax.set_ylabel('Gold Medals')
+    ax.set_title('Gold Medals in Summer and Winter Olympics')
+    ax.set_xticks([i + bar_width / 2 for i in index], countries)
+    ax.legend()
 
-    plt.tight_layout()
+    figure.tight_layout()
     # Save the figure using the output_parent parameter
     if output_parent is not None:
         output_file = Path(output_parent) / 'total_medal_ranking.png'
-        plt.savefig(output_file)
-    plt.close()
+        figure.savefig(output_file)
 
 #Helper function for medal stats
 def plot_medal_stats(
     countries: List[str],
-    medals: dict[str, dict[str, int]],
+    medals: dict[str, dict[str, int]] | pd.DataFrame,
     sport: str,
     output_parent: str | Path
 ) -> None:
@@ -319,35 +751,192 @@ def plot_medal_stats(
 
     Parameters:
       countries (list[str]): List of country names.
-      medals (dict[str, dict[str, int]]): Dictionary of medals for each country.
+      medals (dict[str, dict[str, int]] | pd.DataFrame): Dictionary of medals for each country,
+        or a DataFrame indexed by country with a column per medal, see sport_medals.
       sport (str): The name of the sport.
       output_parent (str | Path): Directory to save the plot in.
     Returns:
       None
     """
-    bar_width = 0.25  
-    index = np.arange(len(countries))  
+    import numpy as np
+
+    medals = _medal_dict(medals)
+    counts = np.array([[medals[country][medal] for medal in medal_types] for country in countries])
 
-    gold_counts = [medals[country]['Gold'] for country in countries]
-    silver_counts = [medals[country]['Silver'] for country in countries]
-    bronze_counts = [medals[country]['Bronze'] for country in countries]
+    chart = MedalChart(countries)
+    chart.update(sport, counts)
+    output_file = Path(output_parent) / f'{sport}_medal_ranking.png'
+    chart.save(output_file)
 
-    plt.figure(figsize=(10, 6))
 
-    plt.bar(index, gold_counts, bar_width, label='Gold', color='#3e4574')
-    plt.bar(index + bar_width, silver_counts, bar_width, label='Silver', color='#00a9ff')
-    plt.bar(index + 2 * bar_width, bronze_counts, bar_width, label='Bronze', color='#581120')
+medal_colors = {"Gold": '#3e4574', "Silver": '#00a9ff', "Bronze": '#581120'}
 
-    plt.xlabel('Countries')
-    plt.ylabel('Medals')
-    plt.title(f'{sport} Medals by Scandinavian Countries')
-    plt.xticks(index + bar_width, countries)
-    plt.legend()
 
-    plt.tight_layout()
-    output_file = Path(output_parent) / f'{sport}_medal_ranking.png'
-    plt.savefig(output_file)
-    plt.close()
+class MedalChart:
+    """Reusable bar chart of the gold, silver and bronze medals of some countries in a sport.
+
+    The figure, axes, bars and labels are made once, and `update` only changes the bar
+    heights and the title, so drawing many sports is much faster than making a new figure
+    for each one. Uses the object-oriented Agg API instead of pyplot, so charts can be
+    drawn from several threads or processes.
+
+    Parameters:
+      countries (list[str]): names of the countries, one group of bars each
+      ax (Axes, optional): axes to draw in, a new 10x6 inch figure if not given
+      ymax (int, optional): fixed top of the y axis, e.g. to compare panels of several sports.
+        By default each sport is scaled to its own highest count.
+      title (str): title format, with the sport as {sport}
+    """
+
+    bar_width = 0.25
+
+    def __init__(
+        self,
+        countries: list[str],
+        ax=None,
+        ymax: int | None = None,
+        title: str = '{sport} Medals by Scandinavian Countries',
+    ):
+        import numpy as np
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        new_figure = ax is None
+        if new_figure:
+            figure = Figure(figsize=(10, 6))
+            FigureCanvasAgg(figure)
+            ax = figure.add_subplot()
+        self.figure = ax.figure
+        self.ax = ax
+        self.title = title
+        self.ymax = ymax
+
+        index = np.arange(len(countries))
+        self.bars = [
+            ax.bar(
+                index + i * self.bar_width,
+                np.zeros(len(countries)),
+                self.bar_width,
+                label=medal,
+                color=medal_colors[medal],
+            )
+            for i, medal in enumerate(medal_types)
+        ]
+        ax.set_xlabel('Countries')
+        ax.set_ylabel('Medals')
+        ax.set_xticks(index + self.bar_width, countries)
+        ax.set_ylim(0, max(ymax or 0, 1) * 1.05)
+        ax.legend()
+        self.title_text = ax.set_title(title.format(sport=""))
+        if new_figure:
+            self.figure.tight_layout()
+
+    def update(self, sport: str, counts: np.ndarray) -> None:
+        """Show the medals of a sport
+
+        Parameters:
+          sport (str): the name of the sport, for the title
+          counts (np.ndarray): medal counts of shape (countries, 3), in the order gold, silver, bronze
+        """
+        import numpy as np
+
+        for medal_bars, medal_counts in zip(self.bars, np.asarray(counts).T):
+            for bar, count in zip(medal_bars, medal_counts.tolist()):
+                bar.set_height(count)
+        # like matplotlib's autoscaling, with a 5% margin above the highest bar
+        ymax = self.ymax if self.ymax is not None else np.max(counts, initial=0)
+        self.ax.set_ylim(0, max(ymax, 1) * 1.05)
+        self.title_text.set_text(self.title.format(sport=sport))
+
+    def save(self, path: str | Path) -> None:
+        """Save the chart, in the format given by the file suffix"""
+        self.figure.savefig(path)
+
+
+def _render_charts(
+    countries: list[str], sports: list[str], counts: np.ndarray, output_parent: Path, fmt: str
+) -> list[Path]:
+    """Draw the charts of some sports with one reusable MedalChart"""
+    chart = MedalChart(countries)
+    paths = []
+    for sport, sport_counts in zip(sports, counts):
+        chart.update(sport, sport_counts)
+        path = output_parent / f'{sport}_medal_ranking.{fmt}'
+        chart.save(path)
+        paths.append(path)
+    return paths
+
+
+def _render_panels(
+    countries: list[str], sports: list[str], counts: np.ndarray, path: Path, shared_ylim: bool = False
+) -> Path:
+    """Draw the charts of all the sports as panels of one figure, on one y scale if shared_ylim"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    ncols = max(1, math.ceil(math.sqrt(len(sports))))
+    nrows = max(1, math.ceil(len(sports) / ncols))
+    figure = Figure(figsize=(5 * ncols, 3.5 * nrows))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots(nrows, ncols, squeeze=False).ravel()
+    ymax = counts.max(initial=0) if shared_ylim else None
+    for ax, sport, sport_counts in zip(axes, sports, counts):
+        chart = MedalChart(countries, ax=ax, ymax=ymax, title='{sport}')
+        chart.update(sport, sport_counts)
+    for ax in axes[len(sports):]:
+        ax.set_visible(False)
+    figure.tight_layout()
+    figure.savefig(path)
+    return path
+
+
+def render_medal_charts(
+    matrix: pd.DataFrame,
+    output_parent: str | Path,
+    workers: int | None = None,
+    fmt: str = "png",
+    multi_panel: bool = False,
+    shared_ylim: bool = False,
+) -> list[Path]:
+    """Draw the medal chart of every sport in a medal matrix, like plot_medal_stats does for one.
+
+    Each worker process draws its share of the sports with one reusable figure, see MedalChart.
+
+    Parameters:
+      matrix (pd.DataFrame): medal counts indexed by sport, with (country, medal) columns, see medal_matrix
+      output_parent (str | Path): directory to save the charts in, as {sport}_medal_ranking.{fmt}
+      workers (int, optional): number of processes to draw in, 0 for one per core.
+        None or 1 draws in this process.
+      fmt (str): file format, e.g. "png" or "svg"
+      multi_panel (bool): draw all the sports as panels of a single medal_ranking.{fmt} instead
+      shared_ylim (bool): with multi_panel, give every panel the y scale of the highest count,
+        so the sports can be compared. Otherwise each chart is scaled to its own sport.
+
+    Returns:
+      paths (list[Path]): the files written
+    """
+    import numpy as np
+    import pandas as pd
+
+    output_parent = Path(output_parent)
+    countries = list(matrix.columns.unique(level=0))
+    sports = list(matrix.index)
+    counts = matrix.reindex(columns=pd.MultiIndex.from_product([countries, medal_types])).to_numpy()
+    counts = counts.reshape(len(sports), len(countries), len(medal_types))
+
+    if multi_panel:
+        return [_render_panels(countries, sports, counts, output_parent / f'medal_ranking.{fmt}', shared_ylim)]
+
+    # one chunk of sports per process, so each process sets up a single figure
+    n_chunks = 1 if workers is None or workers == 1 else workers or os.cpu_count() or 1
+    chunks = [chunk for chunk in np.array_split(np.arange(len(sports)), n_chunks) if len(chunk)]
+    results = parse_many(
+        partial(_render_charts, countries, output_parent=output_parent, fmt=fmt),
+        [[sports[i] for i in chunk] for chunk in chunks],
+        [counts[chunk] for chunk in chunks],
+        workers=workers,
+    )
+    return [path for paths in results for path in paths]
 
 
 # run the whole thing if called as a script, for quick testing
@@ -7,11 +7,121 @@ Filtering URLs from HTML
 from __future__ import annotations
 
 import re
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple
 from urllib.parse import urljoin, urlparse
 
+# href attributes, e.g. of anchor tags
+href_pattern = re.compile(r'href="([^"]+)"', flags=re.IGNORECASE)
+# the start of an href attribute cut off at the end of a chunk, e.g. 'hre' or 'href="/wi'
+partial_href_pattern = re.compile(r'h(?:r(?:e(?:f(?:=(?:"[^"]*)?)?)?)?)?\Z', flags=re.IGNORECASE)
+# wikipedia articles, i.e. pages in the main namespace
+article_pattern = re.compile(r"^https?://[a-z]{2,3}\.wikipedia\.org/wiki/([^:#]*)$", re.IGNORECASE)
+# img tags and their src attribute
+img_pattern = re.compile(r"<img[^>]+>", flags=re.IGNORECASE)
+src_pattern = re.compile(r'src="([^"]+)"', flags=re.IGNORECASE)
+
+# the same patterns for html as raw bytes, e.g. from get_html(..., as_bytes=True),
+# so only the matched urls are decoded and not the whole page
+href_bytes_pattern = re.compile(href_pattern.pattern.encode(), flags=re.IGNORECASE)
+partial_href_bytes_pattern = re.compile(partial_href_pattern.pattern.encode(), flags=re.IGNORECASE)
+img_bytes_pattern = re.compile(img_pattern.pattern.encode(), flags=re.IGNORECASE)
+src_bytes_pattern = re.compile(src_pattern.pattern.encode(), flags=re.IGNORECASE)
+
+
+class Link(NamedTuple):
+    """A link found in an html document
+
+    url (str): the full url, without #fragment
+    kind (str): 'article' for wikipedia articles, 'same-host' for other links to
+        the host of the base url and 'external' for links anywhere else
+    """
+
+    url: str
+    kind: str
+
+
+@lru_cache(maxsize=65536)
+def _resolve_href(base_url: str, href: str) -> Link | None:
+    """Turn an href into a classified link without #fragment, None if it isn't a link to a page
+
+    The same hrefs show up on page after page when crawling (navigation, footers),
+    so the results are memoized.
+    """
+    # Handle same-protocol links
+    if href.startswith("//"):
+        protocol = base_url.split("://")[0]  # Splitting to get the protocol
+        full_url = f"{protocol}:{href}"
+    # Check if the URL starts with 'https://' or 'http://'
+    elif href.startswith("https://") or href.startswith("http://"):
+        full_url = href
+    # Handle URLs that are paths on the same host
+    elif href.startswith("/"):
+        # Use urljoin to correctly handle relative paths
+        full_url = urljoin(base_url, href)
+    else:
+        return None
+    url = full_url.split('#')[0]
+
+    if article_pattern.match(url):
+        kind = "article"
+    elif urlparse(url).netloc == urlparse(base_url).netloc:
+        kind = "same-host"
+    else:
+        kind = "external"
+    return Link(url, kind)
+
+
+def iter_urls(
+    html_or_chunks: str | bytes | Iterable[str] | Iterable[bytes],
+    base_url: str = "https://en.wikipedia.org",
+    unique: bool = True,
+) -> Iterator[Link]:
+    """
+    Find and classify all the url links in a html text, in one pass
+
+    The html can be given as a whole string, or as an iterable of chunks,
+    e.g. from a streaming http response, so the whole document never has to be
+    in memory. Links that are split over two chunks are found as well.
+    The html may also be raw bytes (or a memoryview, e.g. from SavedPage.view),
+    then only the urls found are decoded (as UTF-8).
+
+    Arguments:
+        html_or_chunks (str | bytes | Iterable[str] | Iterable[bytes]): html string, or chunks of it, to parse
+        base_url (str): the base url to the wikipedia.org pages
+        unique (bool): only yield the first occurrence of each url
+    Yields:
+        link (Link) : the (url, kind) of each link, in document order
+    """
+    if isinstance(html_or_chunks, (str, bytes, memoryview)):
+        html_or_chunks = (html_or_chunks,)
+
+    seen = set()
+    tail = None
+
+    for chunk in html_or_chunks:
+        binary = not isinstance(chunk, str)
+        hrefs = href_bytes_pattern if binary else href_pattern
+        partial_hrefs = partial_href_bytes_pattern if binary else partial_href_pattern
+        buffer = chunk if tail is None else tail + chunk
+        last_end = 0
+        for match in hrefs.finditer(buffer):
+            last_end = match.end()
+            href = match.group(1)
+            link = _resolve_href(base_url, href.decode("utf-8", "replace") if binary else href)
+            if link is None or (unique and link.url in seen):
+                continue
+            if unique:
+                seen.add(link.url)
+            yield link
+
+        # keep an href that was cut off by the end of the chunk for the next one
+        partial = partial_hrefs.search(buffer, last_end)
+        tail = buffer[partial.start():] if partial else buffer[:0]
+
 
 def find_urls(
-    html: str,
+    html: str | bytes,
     base_url: str = "https://en.wikipedia.org",
     output: str | None = None,
 ) -> set[str]:
@@ -19,34 +129,13 @@ def find_urls(
     Find all the url links in a html text using regex
 
     Arguments:
-        html (str): html string to parse
+        html (str | bytes): html string to parse, or the raw bytes of it
         base_url (str): the base url to the wikipedia.org pages
         output (Optional[str]): file to write to if wanted
     Returns:
         urls (Set[str]) : set with all the urls found in html text
     """
-    
-    anchor_tags = re.compile(r'href="([^"]+)"', flags=re.IGNORECASE)
-    matches = re.findall(anchor_tags, html)
-
-    urls = set()
-    for match in matches:
-        # Handle same-protocol links
-        if match.startswith("//"):
-            protocol = base_url.split("://")[0]  # Splitting to get the protocol
-            full_url = f"{protocol}:{match}"
-            urls.add(full_url)
-        # Check if the URL starts with 'https://' or 'http://'
-        elif match.startswith("https://") or match.startswith("http://"):
-            urls.add(match)
-        # Handle URLs that are paths on the same host
-        elif match.startswith("/"):
-            # Use urljoin to correctly handle relative paths
-            full_url = urljoin(base_url, match)
-            urls.add(full_url)
-
-    
-    urls = {url.split('#')[0] for url in urls}
+    urls = {link.url for link in iter_urls(html, base_url=base_url)}
 
     # Write to file if requested
     if output:
@@ -59,31 +148,23 @@ def find_urls(
 
 
 def find_articles(
-    html: str,
+    html: str | bytes,
     output: str | None = None,
     base_url: str = "https://en.wikipedia.org",
 ) -> set[str]:
     """Finds all the wiki articles inside a html text. Make call to find urls, and filter
     arguments:
-        - text (str) : the html text to parse
+        - text (str | bytes) : the html text to parse, or the raw bytes of it
         - output (str, optional): the file to write the output to if wanted
         - base_url (str, optional): the base_url to pass through to find_urls
     returns:
         - (Set[str]) : a set with urls to all the articles found
     """
     
-    urls = find_urls(html, base_url=base_url)
-
-    # regex pattern to match 
-    article_pattern = re.compile(r"^https?://[a-z]{2,3}\.wikipedia\.org/wiki/([^:#]*)$", re.IGNORECASE)
-
-    # Initialize an empty set 
-    articles = set()
-
-    # for loop to filter 
-    for url in urls:
-        if article_pattern.match(url):
-            articles.add(url)
+    # the links are classified while they are extracted, so no second pass is needed
+    articles = {
+        link.url for link in iter_urls(html, base_url=base_url) if link.kind == "article"
+    }
 
     # Write to file if wanted
     if output:
@@ -95,11 +176,12 @@ def find_articles(
 
 
 ## Regex example
-def find_img_src(html: str):
+def find_img_src(html: str | bytes):
     """Find all src attributes of img tags in an HTML string
 
     Args:
-        html (str): A string containing some HTML.
+        html (str | bytes): A string containing some HTML, or its raw bytes.
+            Only the src attributes are decoded from bytes.
 
     Returns:
         src_set (set): A set of strings containing image URLs
@@ -107,13 +189,16 @@ def find_img_src(html: str):
     The set contains every found src attribute of an img tag in the given HTML.
     """
 
-    img_pat = re.compile(r"<img[^>]+>", flags=re.IGNORECASE)
-    src_pat = re.compile(r'src="([^"]+)"', flags=re.IGNORECASE)
+    binary = not isinstance(html, str)
+    imgs = img_bytes_pattern if binary else img_pattern
+    srcs = src_bytes_pattern if binary else src_pattern
+
     src_set = set()
     # find all the img tags
-    for img_tag in img_pat.findall(html):
+    for img_tag in imgs.findall(html):
         # then find the src attribute
-        match = src_pat.search(img_tag)
+        match = srcs.search(img_tag)
         if match:
-            src_set.add(match.group(1))
+            src = match.group(1)
+            src_set.add(src.decode("utf-8", "replace") if binary else src)
     return src_set
@@ -5,13 +5,23 @@ Collecting anniversaries from Wikipedia
 """
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 import re
 
+from html_parsing import get_parser, make_soup, parse_many
+from requesting_urls import get_html_many
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
 # Month names to submit for, from Wikipedia:Selected anniversaries namespace
 months_in_namespace = [
     "January",
@@ -29,7 +39,39 @@ months_in_namespace = [
 ]
 
 
-def extract_anniversaries(html: str, month: str) -> list[str]:
+def _first_child_tag(tag):
+    """The first child of a tag, if it is a tag itself (and not text), else None"""
+    first = next(iter(tag.children), None)
+    if first is None or first.name is None:
+        return None
+    return first
+
+
+def is_anniversary_paragraph(p, month: str) -> bool:
+    """Check if a <p> element starts with a (bold) link to a day of the given month,
+    i.e. <p><a href="/wiki/{month}_{day}"> or <p><b><a href="/wiki/{month}_{day}">
+
+    Parameters:
+        - p (bs4.Tag): The paragraph element
+        - month (str): The month in interest
+
+    Returns:
+        - (bool): whether the paragraph is a highlighted anniversary
+    """
+    if p.attrs:
+        return False
+    first = _first_child_tag(p)
+    if first is not None and first.name == "b" and not first.attrs:
+        first = _first_child_tag(first)
+    if first is None or first.name != "a":
+        return False
+    href = first.get("href", "")
+    return re.match(r"/wiki/" + re.escape(month) + r"_{1,2}\d", href) is not None
+
+
+def extract_anniversaries(
+    html: str, month: str, parser: str | None = None, structural: bool = True
+) -> list[str]:
     """Extract all the passages from the html which contain an anniversary, and save their plain text in a list.
         For the pages in the given namespace, all the relevant passages start with a month href
          <p>
@@ -43,6 +85,10 @@ def extract_anniversaries(html: str, month: str) -> list[str]:
     Parameters:
         - html (str): The html to parse
         - month (str): The month in interest, the page name of the Wikipedia:Selected anniversaries namespace
+        - parser (str, optional): The parser backend, 'html.parser' (default), 'lxml' or 'html5lib', see html_parsing.get_parser
+        - structural (bool, optional): Only build the <p> elements of the page, and check their leading link
+                                       on the tree (see is_anniversary_paragraph). If False, the whole page is parsed
+                                       and every <p> is serialized back to html and matched with a regex.
 
     Returns:
         - ann_list (list[str]): A list of the highlighted anniversaries for a given month
@@ -51,14 +97,25 @@ def extract_anniversaries(html: str, month: str) -> list[str]:
                                 {Month} can be any month in the namespace and {day} is a number 1-31
     """
     
-    # parse the HTML
-    soup = BeautifulSoup(html, "html.parser")
-    paragraphs = soup.find_all("p")
-    
-
     # Filter the passages to keep only the highlighted anniversaries
     ann_list = []
 
+    if structural:
+        from bs4 import SoupStrainer
+
+        parser = get_parser(parser)
+        # html5lib can't parse only parts of a document, so it gets the whole page
+        only_paragraphs = SoupStrainer("p") if parser != "html5lib" else None
+        soup = make_soup(html, parser, parse_only=only_paragraphs)
+        for p in soup.find_all("p"):
+            if is_anniversary_paragraph(p, month):
+                ann_list.append(p.get_text())
+        return ann_list
+
+    # parse the HTML
+    soup = make_soup(html, parser)
+    paragraphs = soup.find_all("p")
+
     pattern = r"<p>(<b>)?<a\shref=\"/wiki/" + month + r"_{1,2}\d|_{3}[0,1]\""
 
     for p in paragraphs:
@@ -68,46 +125,100 @@ def extract_anniversaries(html: str, month: str) -> list[str]:
     return ann_list
 
 
-def anniversary_list_to_df(ann_list: list[str]) -> pd.DataFrame:
+# splits events on ';', except inside parentheses
+event_pattern = re.compile(r';(?![^(]*\))')
+
+
+def anniversary_list_to_df(ann_list: list[str], categorical: bool = False) -> pd.DataFrame:
     """Transform the list of anniversaries into a pandas dataframe.
 
+    The whole list is split with vectorized pandas string operations,
+    rather than one anniversary at a time.
+
     Parameters:
         ann_list (list[str]): A list of the highlighted anniversaries for a given month
                                 The format of each element in the list is:
                                 '{Month} {day}: Event 1 (maybe some parenthesis); Event 2; Event 3, something, something\n'
                                 {Month} can be any month in months list and {day} is a number 1-31
+        categorical (bool, optional): Store the "Date" column as a category, which takes a lot less memory
+                                when the frames of many months are concatenated
     Returns:
         df (pd.Dataframe): A (dense) dataframe with columns ["Date"] and ["Event"] where each row represents a single event
     """
-    
+    # imported here, so importing this module stays fast
+    import pandas as pd
 
-    # Store the split parts 
-    ann_table = []
-    # Headers for the dataframe
-    event_pattern = re.compile(r';(?![^(]*\))')
-    
-    # Iempty list to store the split parts 
-    for ann in ann_list:
-        date_part, _, event_part = ann.partition(':')
-        if event_part:
-            # regex pattern to split events
-            events = event_pattern.split(event_part)
-            print(f"Events before stripping: {events}")  
-            for event in events:
-                event = event.strip() 
-                if event:
-                    ann_table.append([date_part.strip(), event])
-                    print(f"Event after stripping: {event}") 
-    
-    # DataFrame from the list of lists
-    df = pd.DataFrame(ann_table, columns=["Date", "Event"])
-    print(df) 
+    if not ann_list:
+        return pd.DataFrame([], columns=["Date", "Event"])
+
+    anniversaries = pd.Series(ann_list, dtype=object)
+
+    # '{Month} {day}' before the first ':', the events after it
+    parts = anniversaries.str.partition(':')
+    df = pd.DataFrame(
+        {
+            "Date": parts[0].str.strip(),
+            "Event": parts[2].str.split(event_pattern),
+        }
+    )
+    logger.debug("Events before stripping:\n%s", df)
+
+    # one row per event
+    df = df.explode("Event", ignore_index=True)
+    df["Event"] = df["Event"].str.strip()
+    df = df[df["Event"].fillna("") != ""].reset_index(drop=True)
+
+    if categorical:
+        df["Date"] = df["Date"].astype("category")
+    logger.debug("Anniversaries:\n%s", df)
 
     return df
 
 
+# revision id of a wikipedia page, from the javascript config in its <head>
+revision_pattern = re.compile(r'"wgRevisionId":\s*(\d+)')
+
+# name of the file keeping track of what each table was built from
+manifest_name = ".manifest.json"
+# version of the tables and manifest, bump it when the way tables are made changes
+# so that all tables are rebuilt
+manifest_version = 2
+
+
+def page_revision(html: str) -> str:
+    """Identify the version of a page, by its wgRevisionId, or a hash of the html if it has none
+
+    Parameters:
+        - html (str): The html of the page
+
+    Returns:
+        - revision (str): 'rev:{id}' or 'sha256:{hash}'
+    """
+    match = revision_pattern.search(html)
+    if match:
+        return f"rev:{match.group(1)}"
+    return "sha256:" + hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write text to path, unless the file already has exactly that content
+
+    Returns:
+        - (bool): whether the file was written
+    """
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
 def anniversary_table(
-    namespace_url: str, month_list: list[str], work_dir: str | Path
+    namespace_url: str,
+    month_list: list[str],
+    work_dir: str | Path,
+    parser: str | None = None,
+    incremental: bool = False,
+    workers: int | None = None,
 ) -> None:
     """Given the namespace_url and a month_list, create a markdown table of highlighted anniversaries for all of the months in list,
         from Wikipedia:Selected anniversaries namespace
@@ -116,6 +227,12 @@ def anniversary_table(
         - namespace_url (str):  Full url to the "Wikipedia:Selected_anniversaries/" namespace
         - month_list (list[str]) - List of months of interest, referring to the page names of the namespace
         - work_dir (str | Path) - (Absolute) path to your working directory
+        - parser (str, optional) - The parser backend to parse the pages with, see html_parsing.get_parser
+        - incremental (bool, optional) - Skip the months whose page revision, namespace_url and parser are the same
+                                         as when their table was last built, as recorded in
+                                         tables_of_anniversaries/.manifest.json
+        - workers (int, optional) - Number of processes to parse the pages in, 0 for one per core
+                                    (None parses in this process), see html_parsing.parse_many
 
     Returns:
         None
@@ -133,20 +250,49 @@ def anniversary_table(
     output_dir = work_dir/"tables_of_anniversaries"
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    for month in month_list:
-        page_url = f"{namespace_url}/{month}"
-        response = requests.get(page_url)
-        html = response.text
-        ann_list = extract_anniversaries(html, month)
+    # what each month's table was built from, for the current manifest_version only
+    manifest_path = output_dir / manifest_name
+    manifest = {}
+    if manifest_path.exists():
+        saved = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if saved.get("version") == manifest_version:
+            manifest = saved["months"]
+    parser = get_parser(parser)
+
+    # fetch all the month pages concurrently
+    page_urls = [f"{namespace_url}/{month}" for month in month_list]
+    htmls = get_html_many(page_urls)
+
+    to_build = []
+    for month, html in zip(month_list, htmls):
+        output_filepath = output_dir / f"anniversaries_{month.lower()}.md"
+        built_from = {"namespace_url": namespace_url, "parser": parser, "revision": page_revision(html)}
+        if incremental and manifest.get(month) == built_from and output_filepath.exists():
+            logger.info("%s is unchanged (%s), skipping", month, built_from["revision"])
+            continue
+        to_build.append((month, html, built_from, output_filepath))
+
+    # parse the pages in parallel, only the lists of anniversaries come back
+    ann_lists = parse_many(
+        partial(extract_anniversaries, parser=parser),
+        [html for _, html, _, _ in to_build],
+        [month for month, _, _, _ in to_build],
+        workers=workers,
+    )
+
+    for (month, _, built_from, output_filepath), ann_list in zip(to_build, ann_lists):
         df = anniversary_list_to_df(ann_list)
 
         # Convert to an .md table
         table =  df.to_markdown(index=False)
 
-        # Save the output
-        output_filepath = output_dir / f"anniversaries_{month.lower()}.md"
-        with open(output_filepath, "w") as file:
-            file.write(table)
+        # Save the output, leaving files with the same content untouched
+        if write_if_changed(output_filepath, table):
+            logger.info("Wrote %s", output_filepath)
+        manifest[month] = built_from
+
+    manifest = {"version": manifest_version, "months": manifest}
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
 
 
 if __name__ == "__main__":
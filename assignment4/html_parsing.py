@@ -0,0 +1,80 @@
+"""
+Choosing the HTML parser backend used with BeautifulSoup,
+and parsing many pages in parallel
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterable
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# environment variable to pick the parser when none is passed explicitly
+PARSER_ENV = "ASSIGNMENT4_PARSER"
+
+default_parser = "html.parser"
+
+# BeautifulSoup tree builders we support, and the module each one needs
+parser_modules = {
+    "html.parser": None,  # pure python, in the standard library
+    "lxml": "lxml",  # C-based, by far the fastest
+    "html5lib": "html5lib",  # pure python, parses like a browser, slowest
+}
+
+
+def get_parser(parser: str | None = None) -> str:
+    """Resolve which parser backend to use
+
+    arguments:
+        parser (str, optional): 'html.parser', 'lxml' or 'html5lib'.
+            If not given, ASSIGNMENT4_PARSER is used, and 'html.parser' if that isn't set either.
+    returns:
+        parser (str): the name of the parser, to pass on to BeautifulSoup
+    """
+    parser = parser or os.environ.get(PARSER_ENV) or default_parser
+    if parser not in parser_modules:
+        raise ValueError(f"{parser!r} is not a supported parser, must be one of {list(parser_modules)}")
+    module = parser_modules[parser]
+    if module is not None and importlib.util.find_spec(module) is None:
+        raise ImportError(f"The {parser!r} parser needs {module}, install it with `pip install {module}`")
+    return parser
+
+
+def make_soup(html: str, parser: str | None = None, **kwargs) -> BeautifulSoup:
+    """Parse html with the chosen parser backend
+
+    arguments:
+        html (str): the html to parse
+        parser (str, optional): parser backend, see `get_parser`
+        **kwargs: passed on to BeautifulSoup, e.g. parse_only
+    returns:
+        soup (BeautifulSoup): the parsed document
+    """
+    # imported here, so importing this module stays fast
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, get_parser(parser), **kwargs)
+
+
+def parse_many(func: Callable, *iterables: Iterable, workers: int | None = None) -> list:
+    """Apply a parsing function to many pages, spread over worker processes
+
+    Parsing with BeautifulSoup is CPU-bound python, so threads don't help,
+    but processes do. `func` should return small results (lists of strings,
+    dicts of medals, ...) rather than soup objects, which are slow to send back.
+
+    arguments:
+        func (Callable): module level function (or functools.partial of one), called as func(*items)
+        *iterables: the arguments for each call, like for map
+        workers (int, optional): number of processes, 0 for one per core.
+            None or 1 parses in this process.
+    returns:
+        results (list): func applied to each set of arguments, in order
+    """
+    if workers is None or workers == 1:
+        return list(map(func, *iterables))
+    with ProcessPoolExecutor(max_workers=workers or None) as executor:
+        return list(executor.map(func, *iterables))
@@ -0,0 +1,158 @@
+"""
+A compact, persistent index of the links between wikipedia articles
+
+Article titles are interned to integer ids, and the links are stored as a
+CSR (compressed sparse row) adjacency: the articles linked from article `i`
+are `targets[offsets[i]:offsets[i + 1]]`. The arrays are saved as .npy files
+and memory-mapped when loaded, so a large index opens instantly and only the
+parts a query touches are read from disk.
+"""
+from __future__ import annotations
+
+from urllib.parse import urlparse
+
+import numpy as np
+
+from array_index import ArrayIndex
+from filter_urls import find_articles
+from wiki_race_challenge import Expander, article_title, base_url, bidirectional_search
+
+
+class LinkGraph(ArrayIndex):
+    """Link graph of wikipedia articles, with CSR adjacency arrays
+
+    Pages are added with `add_page` (or `add_links`), and become part of the
+    arrays on `commit`. Adding a page that is already in the index replaces
+    its links. Saved as titles.txt, offsets.npy and targets.npy, see ArrayIndex.
+    """
+
+    arrays = ("offsets", "targets")
+    names_file = "titles.txt"
+
+    def __init__(self):
+        super().__init__()
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int32)
+        # reverse adjacency, built when first needed
+        self._reverse: tuple[np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def titles(self) -> list[str]:
+        """Article titles, by id"""
+        return self.names
+
+    @titles.setter
+    def titles(self, titles: list[str]) -> None:
+        self.names = titles
+
+    def add_links(self, title: str, linked_titles: set[str]) -> None:
+        """Set the articles linked from the article `title`"""
+        article_id = self.intern(title)
+        self._pending[article_id] = np.array(
+            sorted(self.intern(linked) for linked in linked_titles), dtype=np.int32
+        )
+
+    def add_page(self, url: str, html: str) -> None:
+        """Add the links of a crawled article page, found with find_articles"""
+        host = urlparse(base_url).netloc
+        self.add_links(
+            article_title(url),
+            {
+                article_title(article)
+                for article in find_articles(html, base_url=base_url)
+                if urlparse(article).netloc == host
+            },
+        )
+
+    def commit(self) -> None:
+        """Merge the pages added since the last commit into the CSR arrays"""
+        if not self._pending and len(self.offsets) - 1 == len(self.titles):
+            return
+        n_old = len(self.offsets) - 1
+        n_new = len(self.titles)
+        old_lengths = np.diff(self.offsets)
+
+        lengths = np.zeros(n_new, dtype=np.int64)
+        lengths[:n_old] = old_lengths
+        replaced = np.zeros(n_old, dtype=bool)
+        for article_id, row in self._pending.items():
+            lengths[article_id] = len(row)
+            if article_id < n_old:
+                replaced[article_id] = True
+
+        offsets = np.zeros(n_new + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        targets = np.empty(offsets[-1], dtype=np.int32)
+
+        # move the rows that weren't replaced to their new positions in one go
+        old_rows = np.repeat(np.arange(n_old), old_lengths)
+        keep = ~replaced[old_rows]
+        kept_rows = old_rows[keep]
+        positions = np.arange(len(self.targets))[keep] - self.offsets[kept_rows]
+        targets[offsets[kept_rows] + positions] = self.targets[keep]
+
+        for article_id, row in self._pending.items():
+            targets[offsets[article_id] : offsets[article_id + 1]] = row
+
+        self.offsets = offsets
+        self.targets = targets
+        self._pending = {}
+        self._reverse = None
+
+    def successors(self, article_id: int) -> np.ndarray:
+        """Ids of the articles linked from an article"""
+        if article_id >= len(self.offsets) - 1:
+            return np.zeros(0, dtype=np.int32)
+        return self.targets[self.offsets[article_id] : self.offsets[article_id + 1]]
+
+    def predecessors(self, article_id: int) -> np.ndarray:
+        """Ids of the articles linking to an article"""
+        if self._reverse is None:
+            n = len(self.offsets) - 1
+            sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.offsets))
+            order = np.argsort(self.targets, kind="stable")
+            reverse_offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=n), out=reverse_offsets[1:])
+            self._reverse = (reverse_offsets, sources[order])
+        reverse_offsets, reverse_targets = self._reverse
+        if article_id >= len(reverse_offsets) - 1:
+            return np.zeros(0, dtype=np.int32)
+        return reverse_targets[reverse_offsets[article_id] : reverse_offsets[article_id + 1]]
+
+    def expanders(self) -> tuple[Expander, Expander]:
+        """Forward and backward link lookups from the index, for wiki_race_challenge"""
+        self.commit()
+
+        def lookup(neighbours):
+            def expand(titles: list[str]) -> dict[str, set[str]]:
+                result = {}
+                for title in titles:
+                    article_id = self.ids.get(title)
+                    if article_id is None:
+                        result[title] = set()
+                    else:
+                        result[title] = {self.titles[i] for i in neighbours(article_id).tolist()}
+                return result
+
+            return expand
+
+        return lookup(self.successors), lookup(self.predecessors)
+
+    def shortest_path(self, start: str, finish: str, max_depth: int = 6) -> list[str] | None:
+        """Shortest path of article titles from `start` to `finish`, None if there is none"""
+        forward, backward = self.expanders()
+        return bidirectional_search(start, finish, forward, backward, max_depth=max_depth)
+
+    def memory_footprint(self) -> dict[str, int]:
+        """Approximate bytes used by each part of the index"""
+        reverse = 0 if self._reverse is None else sum(a.nbytes for a in self._reverse)
+        return {
+            "titles": sum(len(title.encode("utf-8")) + 1 for title in self.titles),
+            "offsets": self.offsets.nbytes,
+            "targets": self.targets.nbytes,
+            "reverse": reverse,
+            "pending": sum(row.nbytes for row in self._pending.values()),
+        }
@@ -3,12 +3,627 @@ Task 1.1 - requesting HTML documents with HTTP
 """
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
+import importlib.util
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, partial
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+from urllib.parse import urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# Wikipedia asks clients to identify themselves with a descriptive User-Agent
+DEFAULT_USER_AGENT = "in3110-assignment4/2023.10 (https://github.com/ayeshasishaq/IN3110-WebScraping)"
+
+# Where the shared response cache lives, set ASSIGNMENT4_CACHE_DIR="" to disable it
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "in3110_assignment4"
+
+# compression of the files saved by get_html(..., stream=True), and the module each one needs
+compression_modules = {
+    "gzip": None,  # in the standard library
+    "zstd": "zstandard",  # faster, and smaller files
+}
+
+
+def _tmp_path(path: Path) -> Path:
+    """A temporary file to write `path` to before moving it into place
+
+    Named after the process and thread, so several threads (or processes
+    sharing the cache) writing the same entry don't use the same file.
+    """
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+class ResponseCache:
+    """Persistent on-disk cache of HTTP responses.
+
+    Entries are keyed on the full request URL (URL plus encoded params),
+    hashed to a file name. Each entry is a `<key>.body` file with the raw
+    response bytes and a `<key>.json` file with the final URL, encoding,
+    validators (ETag / Last-Modified) and the time it was stored.
+
+    - Entries younger than `ttl` seconds are served without any request.
+    - Older entries are revalidated with If-None-Match / If-Modified-Since,
+      and a 304 answer refreshes the entry without downloading the body again.
+    - When the bodies take up more than `max_bytes`, the least recently used
+      entries are evicted (the body file mtime is bumped on every hit).
+      Eviction goes down to `low_water` of `max_bytes`, and the total size
+      is kept as a running count, so the directory is only scanned once at
+      start, and again each time the cache fills up.
+
+    Args:
+        directory (str | Path):
+            Directory to keep the cache in, created if missing.
+        ttl (float):
+            Seconds an entry is considered fresh.
+        max_bytes (int):
+            Upper bound for the total size of the cached bodies.
+        low_water (float):
+            Fraction of `max_bytes` to evict down to once it is exceeded.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = DEFAULT_CACHE_DIR,
+        ttl: float = 24 * 60 * 60,
+        max_bytes: int = 500 * 1024 * 1024,
+        low_water: float = 0.9,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        # the cache is shared by the worker threads of get_html_many
+        self._lock = threading.Lock()
+        # total size of the bodies, counted on the first store
+        self._total: int | None = None
+
+    @staticmethod
+    def key(url: str, params: dict | None = None) -> str:
+        """Cache key for a request, the hash of its fully encoded URL"""
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        return hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def lookup(self, key: str) -> tuple[dict, Path] | None:
+        """Return (metadata, body path) for a cached entry, or None"""
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not body_path.exists():
+            return None
+        return meta, body_path
+
+    def is_fresh(self, meta: dict) -> bool:
+        """Whether an entry can be served without revalidating"""
+        return time.time() - meta["stored_at"] < self.ttl
+
+    def conditional_headers(self, meta: dict) -> dict:
+        """Validator headers to revalidate an entry with"""
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, meta: dict, body_path: Path) -> requests.Response | None:
+        """Rebuild a Response from a cached entry, and mark it recently used
+
+        Returns None if the entry was evicted since the lookup, like a cache miss.
+        """
+        try:
+            content = body_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        response = self._cached_response(meta, body_path)
+        response._content = content
+        return response
+
+    def load_stream(
+        self, meta: dict, body_path: Path, chunk_size: int = 1 << 16
+    ) -> tuple[requests.Response, Iterator[bytes]] | None:
+        """Like `load`, but with the body read from disk in chunks instead of into the response"""
+        try:
+            # once open, the body can be read even if it is evicted
+            f = open(body_path, "rb")
+        except FileNotFoundError:
+            return None
+
+        def chunks() -> Iterator[bytes]:
+            with f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+
+        return self._cached_response(meta, body_path), chunks()
+
+    def _cached_response(self, meta: dict, body_path: Path) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = meta["url"]
+        response.encoding = meta["encoding"]
+        response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        # there is no connection behind it to read from or close
+        response._content_consumed = True
+        response.from_cache = True
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            pass
+        return response
+
+    def touch(self, key: str, meta: dict) -> None:
+        """Mark a revalidated (304) entry as fresh again"""
+        meta["stored_at"] = time.time()
+        with self._lock:
+            self._write_meta(key, meta)
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Save a successful response and evict old entries if needed"""
+        if response.status_code != 200:
+            return
+        body_path, _ = self._paths(key)
+        meta = self._meta(response, response.encoding or response.apparent_encoding, len(response.content))
+        with self._lock:
+            tmp_path = _tmp_path(body_path)
+            tmp_path.write_bytes(response.content)
+            self._add_body(key, tmp_path, meta)
+
+    def store_stream(self, key: str, response: requests.Response, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass on the body chunks of a streamed response, saving them to the cache on the way
+
+        The entry is only stored once all the chunks have gone by.
+        """
+        if response.status_code != 200:
+            yield from chunks
+            return
+        body_path, _ = self._paths(key)
+        tmp_path = _tmp_path(body_path)
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            # no apparent_encoding, guessing it needs the whole body
+            meta = self._meta(response, response.encoding, size)
+            with self._lock:
+                self._add_body(key, tmp_path, meta)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _meta(response: requests.Response, encoding: str | None, size: int) -> dict:
+        return {
+            "url": response.url,
+            "encoding": encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": {
+                name: response.headers[name]
+                for name in ("Content-Type", "ETag", "Last-Modified")
+                if name in response.headers
+            },
+            "stored_at": time.time(),
+            "size": size,
+        }
+
+    def _add_body(self, key: str, tmp_path: Path, meta: dict) -> None:
+        """Move a new body into place, evicting if the cache got too big (with the lock held)"""
+        body_path, _ = self._paths(key)
+        if self._total is None:
+            self._total = self.size()
+        try:
+            # replacing an entry, its old body no longer counts
+            self._total -= body_path.stat().st_size
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, body_path)
+        self._write_meta(key, meta)
+        self._total += meta["size"]
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        _, meta_path = self._paths(key)
+        tmp_path = _tmp_path(meta_path)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def size(self) -> int:
+        """Total size in bytes of the cached bodies"""
+        return sum(path.stat().st_size for path in self.directory.glob("*.body"))
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache is down to low_water of max_bytes"""
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for body_path in self.directory.glob("*.body"):
+            try:
+                stat = body_path.stat()
+            except FileNotFoundError:
+                # evicted by another process sharing the directory
+                continue
+            entries.append((stat.st_mtime, stat.st_size, body_path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, body_path in sorted(entries):
+            if total <= self.low_water * self.max_bytes:
+                break
+            body_path.unlink(missing_ok=True)
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+        # the scan also corrects the count for changes made by other processes
+        self._total = total
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            for path in self.directory.iterdir():
+                if path.suffix in {".body", ".json"}:
+                    path.unlink(missing_ok=True)
+            self._total = 0
+
+
+def default_cache() -> ResponseCache | None:
+    """The cache used by the shared Fetcher.
+
+    Lives in ASSIGNMENT4_CACHE_DIR if set, ~/.cache/in3110_assignment4 otherwise.
+    An empty ASSIGNMENT4_CACHE_DIR turns caching off.
+    """
+    directory = os.environ.get("ASSIGNMENT4_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+    if not directory:
+        return None
+    return ResponseCache(directory)
+
+
+class Fetcher:
+    """Shared HTTP fetcher with a pooled, keep-alive `requests.Session`.
+
+    All the scraping modules go through one of these, so that consecutive
+    requests to the same host reuse the open TCP+TLS connection instead of
+    doing a new handshake for every page.
+
+    Args:
+        pool_connections (int):
+            Number of per-host connection pools to keep around.
+        pool_maxsize (int):
+            Maximum number of connections kept open to a single host.
+        pool_block (bool):
+            If True, never open more than `pool_maxsize` connections to a host,
+            wait for a free one instead.
+        timeout (float | tuple[float, float]):
+            (connect, read) timeout in seconds, passed on to every request.
+        retries (int):
+            How many times to retry failed connections and retryable statuses.
+        backoff_factor (float):
+            Sleep `backoff_factor * 2 ** (retry - 1)` seconds between retries.
+        status_forcelist (tuple[int, ...]):
+            HTTP statuses that should be retried.
+        headers (dict, optional):
+            Extra headers to send with every request.
+        cache (ResponseCache, optional):
+            Cache to serve and store responses from, no caching if None.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = True,
+        timeout: float | tuple[float, float] = (3.05, 30),
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        status_forcelist: tuple[int, ...] = (429, 500, 502, 503, 504),
+        headers: dict | None = None,
+        cache: ResponseCache | None = None,
+    ):
+        self.timeout = timeout
+        self.cache = cache
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=self.retry,
+        )
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = DEFAULT_USER_AGENT
+        if headers:
+            self.session.headers.update(headers)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def get(
+        self, url: str, params: dict | None = None, use_cache: bool = True, **kwargs
+    ) -> requests.Response:
+        """GET `url` over the pooled session and return the response.
+
+        With a cache, fresh entries are returned without a request, and stale
+        ones are revalidated with a conditional GET.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cache is None or not use_cache:
+            return self.session.get(url, params=params, **kwargs)
+
+        key = self.cache.key(url, params)
+        cached, response = self._cached_get(key, url, params, self.cache.load, kwargs)
+        if cached is not None:
+            return cached
+        self.cache.store(key, response)
+        return response
+
+    def stream(
+        self, url: str, params: dict | None = None, chunk_size: int = 1 << 16, use_cache: bool = True, **kwargs
+    ) -> tuple[requests.Response, Iterator[bytes]]:
+        """GET `url` without reading the whole body into memory.
+
+        Returns the response (status, final URL, headers) and an iterator over
+        its body in chunks of up to `chunk_size` bytes. Cached bodies are read
+        from disk, and downloaded ones are written to the cache as they go by.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs["stream"] = True
+        if self.cache is None or not use_cache:
+            response = self.session.get(url, params=params, **kwargs)
+            return response, response.iter_content(chunk_size)
+
+        key = self.cache.key(url, params)
+        load = partial(self.cache.load_stream, chunk_size=chunk_size)
+        cached, response = self._cached_get(key, url, params, load, kwargs)
+        if cached is not None:
+            return cached
+        return response, self.cache.store_stream(key, response, response.iter_content(chunk_size))
+
+    def _cached_get(self, key: str, url: str, params: dict | None, load: Callable, kwargs: dict) -> tuple:
+        """Answer a request from the cache if possible, revalidating a stale entry
+
+        Returns (what `load` made of the entry, None) when the cache can answer,
+        and (None, the new response) otherwise.
+        """
+        cached = self.cache.lookup(key)
+        if cached is not None:
+            meta, body_path = cached
+            if self.cache.is_fresh(meta):
+                loaded = load(meta, body_path)
+                if loaded is not None:
+                    return loaded, None
+            else:
+                headers = {**(kwargs.get("headers") or {}), **self.cache.conditional_headers(meta)}
+                response = self.session.get(url, params=params, **{**kwargs, "headers": headers})
+                if response.status_code != 304:
+                    return None, response
+                response.close()
+                loaded = load(meta, body_path)
+                if loaded is not None:
+                    self.cache.touch(key, meta)
+                    return loaded, None
+            # evicted by another thread since the lookup, so it's a miss after all
+        return None, self.session.get(url, params=params, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
 
+    def __enter__(self) -> Fetcher:
+        return self
 
-def get_html(url: str, params: dict | None = None, output: str | None = None):
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_fetcher: Fetcher | None = None
+
+
+def get_fetcher() -> Fetcher:
+    """Return the shared Fetcher, creating it on first use"""
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = Fetcher(cache=default_cache())
+    return _fetcher
+
+
+def set_fetcher(fetcher: Fetcher | None) -> Fetcher | None:
+    """Replace the shared Fetcher, e.g. to change pool size or timeouts.
+
+    Passing None resets it, so a default one is created on next use.
+    Returns the previous Fetcher, which is not closed.
+    """
+    global _fetcher
+    previous = _fetcher
+    _fetcher = fetcher
+    return previous
+
+
+def _check_compression(compress: str | None) -> None:
+    """Raise if `compress` isn't a supported compression, or its module is missing"""
+    if compress is None:
+        return
+    if compress not in compression_modules:
+        raise ValueError(
+            f"{compress!r} is not a supported compression, must be None or one of {list(compression_modules)}"
+        )
+    module = compression_modules[compress]
+    if module is not None and importlib.util.find_spec(module) is None:
+        raise ImportError(f"{compress} compression needs {module}, install it with `pip install {module}`")
+
+
+def _open_file(path: str | Path, mode: str, compress: str | None = None) -> BinaryIO:
+    """Open a file for binary reading or writing, through the given compression"""
+    _check_compression(compress)
+    if compress is None:
+        return open(path, mode)
+    if compress == "gzip":
+        # level 6 (zlib's default) is several times faster to write than gzip's 9, for about the same size
+        return gzip.open(path, mode, compresslevel=6)
+    import zstandard
+
+    return zstandard.open(path, mode)
+
+
+class SavedPage:
+    """A page saved to disk by `get_html(..., output=..., stream=True)`.
+
+    Nothing is read from the file until asked for. The file has the same
+    format as the other outputs of get_html: the final URL on the first line,
+    and the body, as it was received, on the rest. With `compress` the whole
+    file is compressed, so it decompresses to that same format.
+
+    Args:
+        path (str | Path):
+            The saved file.
+        compress (str, optional):
+            How the file is compressed, None, 'gzip' or 'zstd'.
+        url (str, optional):
+            The URL, if known, so it isn't read back from the file.
+    """
+
+    def __init__(self, path: str | Path, compress: str | None = None, url: str | None = None):
+        self.path = Path(path)
+        self.compress = compress
+        if url is not None:
+            self.url = url
+        self._mmap: mmap.mmap | None = None
+        self._view: memoryview | None = None
+
+    @cached_property
+    def url(self) -> str:
+        """The URL on the first line"""
+        with _open_file(self.path, "rb", self.compress) as f:
+            return f.readline().rstrip(b"\n").decode("utf-8")
+
+    def open(self) -> BinaryIO:
+        """The (decompressed) file, positioned at the start of the body"""
+        f = _open_file(self.path, "rb", self.compress)
+        f.readline()
+        return f
+
+    def read_bytes(self) -> bytes:
+        """The body, as it was received"""
+        with self.open() as f:
+            return f.read()
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        """The body, decoded"""
+        return self.read_bytes().decode(encoding, "replace")
+
+    def view(self) -> memoryview:
+        """The body of an uncompressed file, memory-mapped instead of read
+
+        The view can be passed to the extractors in filter_urls and collect_dates
+        like bytes. It stays valid until `close`, which needs any slices taken
+        from it to be released first.
+        """
+        if self.compress is not None:
+            raise ValueError(f"{self.path} is {self.compress} compressed, it can't be memory-mapped")
+        if self._view is None:
+            with open(self.path, "rb") as f:
+                start = len(f.readline())
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)[start:]
+        return self._view
+
+    def close(self) -> None:
+        """Unmap the file, if `view` mapped it"""
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+            self._view = self._mmap = None
+
+    def __enter__(self) -> SavedPage:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"SavedPage({str(self.path)!r}, compress={self.compress!r})"
+
+
+def download(
+    url: str,
+    output: str | Path,
+    params: dict | None = None,
+    compress: str | None = None,
+    chunk_size: int = 1 << 16,
+) -> SavedPage:
+    """Stream a page to disk, writing the body chunk by chunk as it arrives.
+
+    Only one chunk of the page is in memory at a time. The file is written
+    under a temporary name and moved into place when complete, so `output`
+    never holds half a page.
+
+    Args:
+        url (str):
+            The URL to retrieve.
+        output (str | Path):
+            Path to save the page to, with the URL on the first line.
+        params (dict, optional):
+            URL parameters to add.
+        compress (str, optional):
+            Compress the file with 'gzip' or 'zstd' (needs zstandard).
+        chunk_size (int):
+            Bytes to read from the connection at a time.
+    Returns:
+        page (SavedPage):
+            A handle to read the saved page from.
+    """
+    # fail before downloading anything if the compression isn't available
+    _check_compression(compress)
+    response, chunks = get_fetcher().stream(url, params=params, chunk_size=chunk_size)
+    tmp_path = Path(f"{output}.tmp")
+    try:
+        with _open_file(tmp_path, "wb", compress) as file:
+            file.write(response.url.encode("utf-8") + b"\n")
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(tmp_path, output)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+        response.close()
+    return SavedPage(output, compress, url=response.url)
+
+
+def get_html(
+    url: str,
+    params: dict | None = None,
+    output: str | None = None,
+    as_bytes: bool = False,
+    stream: bool = False,
+    compress: str | None = None,
+):
     """Get an HTML page and return its contents.
 
+    Pages are served from the shared response cache when possible,
+    see `ResponseCache`.
+
     Args:
         url (str):
             The URL to retrieve.
@@ -16,18 +631,45 @@ def get_html(url: str, params: dict | None = None, output: str | None = None):
             URL parameters to add.
         output (str, optional):
             (optional) path where output should be saved.
+        as_bytes (bool):
+            Return the raw body without decoding it. This skips the charset
+            detection and the decoded copy of `response.text`, and the
+            extractors in filter_urls and collect_dates work on bytes directly.
+        stream (bool):
+            Write the page to `output` chunk by chunk as it arrives, instead of
+            reading it into memory first, and return a `SavedPage` handle to it.
+            Keeps memory flat when saving many large pages, see `download`.
+        compress (str, optional):
+            With stream=True, compress the saved file with 'gzip' or 'zstd'.
     Returns:
-        html (str):
-            The HTML of the page, as text.
+        html (str | bytes | SavedPage):
+            The HTML of the page, as text (or bytes with as_bytes=True),
+            or the saved file with stream=True.
     """
-    # passing the optional parameters argument to the get function
-    response = requests.get(url, params=params)
+    if stream or compress:
+        if not output:
+            raise ValueError("stream=True and compress need an output file to write to")
+        return download(url, output, params=params, compress=compress)
+
+    # passing the optional parameters argument to the get function,
+    # through the shared session so the connection is reused
+    response = get_fetcher().get(url, params=params)
     # response.raise_for_status()
 
+    if as_bytes:
+        html_bytes = response.content
+        if output:
+            # same format as below, with the body written as it was received
+            with open(output, 'wb') as file:
+                file.write(response.url.encode('utf-8') + b'\n')
+                file.write(html_bytes)
+        return html_bytes
+
     html_str = response.text
 
     if output:
         # if output is specified, the request url and text content are written
+        # (response.url is the final URL, also when served from the cache)
         # to the file at `output`.
         # The first line should be the URL,
         # and the rest of the file should be the response contents.
@@ -38,3 +680,69 @@ def get_html(url: str, params: dict | None = None, output: str | None = None):
         print(f"Finished writing to file: {output}")
 
     return html_str
+
+
+async def get_html_many_async(
+    urls: list[str],
+    params: list[dict | None] | None = None,
+    concurrency: int = 8,
+    per_host: int = 4,
+    as_bytes: bool = False,
+) -> list[str] | list[bytes]:
+    """Coroutine version of `get_html_many`, for use inside a running event loop"""
+    if params is None:
+        params = [None] * len(urls)
+    fetcher = get_fetcher()
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+    host_limits: dict[str, asyncio.Semaphore] = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def fetch(url: str, url_params: dict | None) -> str | bytes:
+            host = urlparse(url).netloc
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+            # take the host slot first, so we don't sit on a global slot
+            # while waiting for a busy host
+            async with host_limit, limit:
+                response = await loop.run_in_executor(
+                    executor, lambda: fetcher.get(url, params=url_params)
+                )
+            return response.content if as_bytes else response.text
+
+        return await asyncio.gather(
+            *(fetch(url, url_params) for url, url_params in zip(urls, params))
+        )
+
+
+def get_html_many(
+    urls: list[str],
+    params: list[dict | None] | None = None,
+    concurrency: int = 8,
+    per_host: int = 4,
+    as_bytes: bool = False,
+) -> list[str] | list[bytes]:
+    """Get several HTML pages concurrently and return their contents.
+
+    The requests go through the shared Fetcher (and its cache), with at most
+    `concurrency` requests in flight, and at most `per_host` to any single
+    host, so we stay polite to Wikipedia.
+
+    Args:
+        urls (list[str]):
+            The URLs to retrieve.
+        params (list[dict | None], optional):
+            URL parameters for each of the URLs.
+        concurrency (int):
+            Maximum number of requests in flight at once.
+        per_host (int):
+            Maximum number of requests in flight to the same host.
+        as_bytes (bool):
+            Return the raw bodies without decoding them, see `get_html`.
+    Returns:
+        htmls (list[str] | list[bytes]):
+            The HTML of each page, in the same order as `urls`.
+    """
+    return asyncio.run(
+        get_html_many_async(urls, params, concurrency=concurrency, per_host=per_host, as_bytes=as_bytes)
+    )
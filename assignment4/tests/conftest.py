@@ -1,3 +1,4 @@
+import importlib.util
 import sys
 from pathlib import Path
 
@@ -6,6 +7,48 @@ assignment4 = Path(__file__).parent.parent.absolute()
 # Ensure assignment4 dir is on sys.path
 sys.path.insert(0, str(assignment4))
 
+# test data shared by several test modules, imported with `from conftest import ...`
+
+# parsers whose modules are installed here
+available_parsers = [
+    parser
+    for parser, module in [("html.parser", None), ("lxml", "lxml"), ("html5lib", "html5lib")]
+    if module is None or importlib.util.find_spec(module) is not None
+]
+
+
+# a small link graph: page -> pages it links to
+graph = {
+    "Python": {"Guido", "Monty Python", "Snake"},
+    "Guido": {"Netherlands"},
+    "Monty Python": {"Comedy", "BBC"},
+    "Snake": {"Reptile"},
+    "Netherlands": {"Europe"},
+    "Comedy": {"Peace"},
+    "BBC": {"Europe"},
+    "Europe": {"Peace"},
+    "Reptile": set(),
+    "Peace": {"War"},
+    "War": {"Peace"},
+}
+
+
+# a country page with medals by summer and winter sport
+country_HTML = """
+<h2><span class="mw-headline" id="Medals_by_summer_sport">Medals by summer sport</span></h2>
+<table class="wikitable">
+<tr><th>Sport</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th></tr>
+<tr><th><a href="/wiki/Sailing">Sailing</a></th><td>17</td><td>11</td><td>4</td><td>32</td></tr>
+<tr><th><a href="/wiki/Cycling">Track cycling</a></th><td>2</td><td>-</td><td>1</td><td>3</td></tr>
+<tr class="sortbottom"><th>Totals</th><td>61</td><td>52</td><td>46</td><td>159</td></tr>
+</table>
+<h2><span class="mw-headline" id="Medals_by_Winter_Sport">Medals by winter sport</span></h2>
+<table class="wikitable">
+<tr><th>Sport</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th></tr>
+<tr class="sortbottom"><th>Totals</th><td>148</td><td>133</td><td>124</td><td>405</td></tr>
+</table>
+"""
+
 
 # Add custom markers, such that they appear in pytest --markers
 def pytest_configure(config):
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from array_index import ArrayIndex
+
+
+class Counts(ArrayIndex):
+    arrays = ("counts",)
+    names_file = "words.txt"
+
+    def __init__(self):
+        super().__init__()
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def commit(self):
+        counts = np.zeros(len(self.names), dtype=np.int64)
+        counts[: len(self.counts)] = self.counts
+        for word_id, row in self._pending.items():
+            counts[word_id] = row.sum()
+        self.counts = counts
+        self._pending = {}
+
+
+def test_intern():
+    index = Counts()
+    assert [index.intern(word) for word in ["a", "b", "a", "c"]] == [0, 1, 0, 2]
+    assert index.names == ["a", "b", "c"]
+    assert index.ids == {"a": 0, "b": 1, "c": 2}
+
+
+def test_save_load(tmp_path):
+    index = Counts()
+    index._pending[index.intern("a")] = np.array([1, 2])
+    index._pending[index.intern("b")] = np.array([5])
+    index.save(tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["counts.npy", "words.txt"]
+
+    loaded = Counts.load(tmp_path)
+    assert isinstance(loaded.counts, np.memmap)
+    assert loaded.counts.tolist() == [3, 5]
+    assert loaded.ids == {"a": 0, "b": 1}
+    # saving over the files the arrays are mapped from
+    loaded._pending[loaded.intern("c")] = np.array([7])
+    loaded.save(tmp_path)
+    assert Counts.load(tmp_path, mmap=False).counts.tolist() == [3, 5, 7]
+
+
+def test_commit_is_abstract():
+    class NoCommit(ArrayIndex):
+        pass
+
+    with pytest.raises(TypeError):
+        NoCommit()
+    with pytest.raises(TypeError):
+        ArrayIndex()
@@ -1,5 +1,9 @@
+import random
+import time
+from pathlib import Path
+
 import pytest
-from collect_dates import find_dates
+from collect_dates import convert_month, find_dates, find_dates_parallel, iter_dates, zero_pad
 from requesting_urls import get_html
 
 date_text = """
@@ -104,3 +108,136 @@ def test_date_order(date_str, expected):
     """
     dates = find_dates(date_str)
     assert dates == expected, "Order wrong in finding dates"
+
+
+@pytest.mark.task2
+def test_convert_month_zero_pad():
+    assert convert_month("September") == "09"
+    assert convert_month("march") == "03"
+    assert convert_month("7") == "07"
+    assert zero_pad("2") == "02"
+    assert zero_pad("31") == "31"
+
+
+@pytest.mark.task2
+@pytest.mark.parametrize(
+    "date_str",
+    [
+        "2022-4-15",  # ISO needs two-digit months and days
+        "32 January 2020",
+        "February 12, 2054",
+        "12345-01-01",
+        "Mayday 2 2020",
+    ],
+)
+def test_find_dates_rejects(date_str):
+    assert find_dates(date_str) == []
+
+
+@pytest.mark.task2
+def test_find_dates_output(tmp_path):
+    output = tmp_path / "dates.txt"
+    dates = find_dates(date_text, output=str(output))
+    assert output.read_text().splitlines() == dates == ["2020/01/02", "1954/02/12", "2015/03/31", "2022/04/15"]
+    assert list(iter_dates(date_text)) == dates
+
+
+@pytest.mark.task2
+def test_find_dates_throughput():
+    # a saved wikipedia page, repeated to a few MB
+    html = (Path(__file__).parent.parent / "optionalargument.txt").read_text(encoding="utf-8")
+    text = (html + date_text) * 50
+    megabytes = len(text.encode("utf-8")) / 1e6
+
+    tic = time.perf_counter()
+    dates = find_dates(text)
+    seconds = time.perf_counter() - tic
+
+    assert dates[-4:] == ["2020/01/02", "1954/02/12", "2015/03/31", "2022/04/15"]
+    print(f"find_dates: {megabytes / seconds:.1f} MB/s on {megabytes:.1f} MB")
+    # very loose, only catches pathological slowdowns like catastrophic backtracking
+    assert megabytes / seconds > 1
+
+
+@pytest.mark.task2
+@pytest.mark.parametrize("chunk_size", [20, 23, 29, 64, 1000])
+def test_find_dates_chunked(chunk_size):
+    text = date_text * 5
+    # dates cut by chunk boundaries at all kinds of positions are found once
+    assert find_dates_parallel(text, chunk_size=chunk_size, overlap=19) == find_dates(text)
+    # same for a text that comes in small pieces
+    lines = text.splitlines(keepends=True)
+    assert find_dates_parallel(lines, chunk_size=chunk_size, overlap=19) == find_dates(text)
+
+
+@pytest.mark.task2
+def test_find_dates_many_small_pieces():
+    # a dump read line by line, over 10 MB in pieces of about 100 characters
+    lines = (date_text * 2000).splitlines(keepends=True)
+    lines = lines * (10_000_000 // sum(map(len, lines)) + 1)
+    megabytes = sum(map(len, lines)) / 1e6
+
+    tic = time.perf_counter()
+    dates = find_dates_parallel(lines)
+    seconds = time.perf_counter() - tic
+
+    assert dates == find_dates("".join(lines))
+    print(f"find_dates_parallel: {megabytes / seconds:.1f} MB/s on {megabytes:.1f} MB of lines")
+    # re-chunking used to copy the buffer for every piece, well under 1 MB/s
+    assert megabytes / seconds > 1
+
+
+@pytest.mark.task2
+@pytest.mark.parametrize("chunk_size", [21, 33, 57, 100, 115, 130])
+@pytest.mark.parametrize("workers", [None, 2])
+def test_find_dates_chunked_overlapping_formats(chunk_size, workers):
+    # '1999 March 12, 1999' holds a YMD and an MDY date, which one is found depends
+    # on where the scan is, and chunks must line up with the scan of the whole text
+    text = "1999 " + "March 12, 1999 " * 20
+    assert len(find_dates(text)) == 20
+    assert find_dates_parallel(text, workers=workers, chunk_size=chunk_size, overlap=20) == find_dates(text)
+
+    rng = random.Random(0)
+    tokens = ["1999", "March", "12,", "12", "2001-03-04", "May", "4", "2000", "x", "<p>", "September", "30,", "\n"]
+    for _ in range(20):
+        text = " ".join(rng.choice(tokens) for _ in range(rng.randint(10, 400)))
+        assert find_dates_parallel(text, workers=workers, chunk_size=chunk_size, overlap=20) == find_dates(text)
+
+
+@pytest.mark.task2
+def test_find_dates_parallel_files(tmp_path):
+    html = (Path(__file__).parent.parent / "optionalargument.txt").read_text(encoding="utf-8")
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"page{i}.html"
+        path.write_text(html + date_text * (i + 1), encoding="utf-8")
+        paths.append(path)
+    expected = [date for path in paths for date in find_dates(path.read_text(encoding="utf-8"))]
+
+    output = tmp_path / "dates.txt"
+    dates = find_dates_parallel(paths, output=str(output), workers=2, chunk_size=10_000)
+    assert dates == expected
+    assert output.read_text().splitlines() == expected
+    assert find_dates_parallel(paths, chunk_size=10_000, as_bytes=True) == expected
+
+    with pytest.raises(ValueError):
+        find_dates_parallel(html, chunk_size=10, overlap=64)
+
+
+@pytest.mark.task2
+def test_find_dates_bytes():
+    html = (Path(__file__).parent.parent / "optionalargument.txt").read_text(encoding="utf-8")
+    text = html + date_text + "born 26\u00a0September 1981"
+    data = text.encode("utf-8")
+    assert find_dates(data) == find_dates(text)
+    assert find_dates(data)[-1] == "1981/09/26"
+    assert find_dates_parallel(data, chunk_size=1000) == find_dates(text)
+
+    # raw lines of a dump, many small bytes pieces, are re-chunked without decoding
+    lines = (text * 20).encode("utf-8").splitlines(keepends=True)
+    megabytes = sum(map(len, lines)) / 1e6
+    tic = time.perf_counter()
+    dates = find_dates_parallel(lines, chunk_size=100_000)
+    seconds = time.perf_counter() - tic
+    assert dates == find_dates(text * 20)
+    assert megabytes / seconds > 1
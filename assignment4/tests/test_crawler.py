@@ -0,0 +1,160 @@
+import json
+import time
+
+import pytest
+from conftest import graph
+from crawler import BloomFilter, Crawler, HostRateLimiter
+from wiki_race_challenge import article_title, article_url
+
+
+def fetch(url):
+    """Fake get_html, serving the pages of the test graph"""
+    links = graph[article_title(url)]
+    return "".join(f'<a href="{article_url(title)}">{title}</a>' for title in links)
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"https://en.wikipedia.org/wiki/{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"https://example.org/{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    restored = BloomFilter.from_dict(bloom.to_dict())
+    assert all(item in restored for item in items)
+    assert len(restored) == 1000
+
+
+def test_host_rate_limiter():
+    limiter = HostRateLimiter(delay=0.05)
+    tic = time.perf_counter()
+    for _ in range(3):
+        limiter.wait("https://en.wikipedia.org/wiki/A")
+    limiter.wait("https://no.wikipedia.org/wiki/A")
+    assert 0.1 <= time.perf_counter() - tic < 0.5
+
+
+@pytest.mark.parametrize("max_depth, expected", [(0, {"Python"}), (1, {"Python", "Guido", "Monty Python", "Snake"})])
+def test_crawl_depth(max_depth, expected):
+    crawler = Crawler([article_url("Python")], fetch=fetch, max_depth=max_depth, delay=0)
+    crawled = {article_title(url) for url, _ in crawler.run()}
+    assert crawled == expected
+
+
+def test_crawl_all():
+    crawler = Crawler([article_url("Python")], fetch=fetch, max_depth=10, delay=0, workers=3)
+    pages = dict(crawler.run())
+    # every reachable page is crawled once
+    assert {article_title(url) for url in pages} == set(graph)
+    assert crawler.pages == len(pages)
+    assert {article_title(url) for url in pages[article_url("Europe")]} == {"Peace"}
+
+
+def test_crawl_budget_and_resume(tmp_path):
+    checkpoint = tmp_path / "crawl.json"
+    crawler = Crawler(
+        [article_url("Python")], fetch=fetch, max_depth=10, max_pages=4, delay=0, workers=2, checkpoint=checkpoint
+    )
+    first = [url for url, _ in crawler.run()]
+    assert len(first) == 4
+    assert checkpoint.exists()
+
+    resumed = Crawler.resume(checkpoint, fetch=fetch, max_depth=10, max_pages=100, delay=0)
+    rest = [url for url, _ in resumed.run()]
+    assert not set(first) & set(rest)
+    assert {article_title(url) for url in first + rest} == set(graph)
+    assert resumed.pages == len(graph)
+
+
+def test_crawl_failures(tmp_path):
+    tries = []
+
+    def flaky_fetch(url):
+        if article_title(url) == "Guido":
+            tries.append(url)
+            raise ConnectionError("nope")
+        return fetch(url)
+
+    checkpoint = tmp_path / "crawl.json"
+    crawler = Crawler([article_url("Python")], fetch=flaky_fetch, max_depth=10, delay=0, checkpoint=checkpoint)
+    crawled = {article_title(url) for url, _ in crawler.run()}
+    assert "Guido" not in crawled
+    assert "Netherlands" not in crawled
+    assert crawler.failed == 1
+    assert len(tries) == 3
+    assert crawler.failed_urls == [(1, article_url("Guido"))]
+
+    # the pages given up on are tried again when the crawl is resumed
+    resumed = Crawler.resume(checkpoint, fetch=fetch, max_depth=10, delay=0)
+    assert {article_title(url) for url, _ in resumed.run()} == {"Guido", "Netherlands"}
+    assert resumed.failed == 0
+
+
+def test_crawl_transient_failure():
+    failures = {"Guido": 2}
+
+    def flaky_fetch(url):
+        title = article_title(url)
+        if failures.get(title):
+            failures[title] -= 1
+            raise TimeoutError("try again")
+        return fetch(url)
+
+    crawler = Crawler([article_url("Python")], fetch=flaky_fetch, max_depth=10, delay=0)
+    crawled = {article_title(url) for url, _ in crawler.run()}
+    assert crawled == set(graph)
+    assert crawler.failed == 0
+    assert crawler.attempts == {}
+
+
+@pytest.mark.parametrize("checkpoint", [False, True])
+def test_crawl_small_frontier(tmp_path, checkpoint):
+    crawler = Crawler(
+        [article_url("Python")],
+        fetch=fetch,
+        max_depth=10,
+        delay=0,
+        max_frontier=1,
+        checkpoint=tmp_path / "crawl.json" if checkpoint else None,
+    )
+    pages = [url for url, _ in crawler.run()]
+    assert sorted(article_title(url) for url in pages) == sorted(graph)
+    assert len(crawler.frontier) == 0
+
+
+def test_crawl_resume_spilled_frontier(tmp_path):
+    checkpoint = tmp_path / "crawl.json"
+    crawler = Crawler(
+        [article_url("Python")], fetch=fetch, max_depth=10, max_pages=2, delay=0, max_frontier=1, checkpoint=checkpoint
+    )
+    first = [url for url, _ in crawler.run()]
+    assert (tmp_path / "crawl.json.frontier").stat().st_size > 0
+
+    resumed = Crawler.resume(checkpoint, fetch=fetch, max_depth=10, delay=0, max_frontier=1)
+    rest = [url for url, _ in resumed.run()]
+    assert not set(first) & set(rest)
+    assert sorted(article_title(url) for url in first + rest) == sorted(graph)
+
+
+def test_checkpoint_visited_file(tmp_path):
+    checkpoint = tmp_path / "crawl.json"
+    crawler = Crawler([article_url("Python")], fetch=fetch, max_depth=0, delay=0, checkpoint=checkpoint)
+    list(crawler.run())
+    bloom_files = list(tmp_path.glob("crawl.json.bloom*"))
+    assert len(bloom_files) == 1
+    assert "bits" not in json.loads(checkpoint.read_text())["visited"]
+    mtime = bloom_files[0].stat().st_mtime_ns
+
+    # unchanged, so not written again
+    crawler.save_checkpoint(checkpoint)
+    assert list(tmp_path.glob("crawl.json.bloom*")) == bloom_files
+    assert bloom_files[0].stat().st_mtime_ns == mtime
+
+    # changed, so written to a new file replacing the old one
+    crawler.enqueue(article_url("Europe"), 1)
+    crawler.save_checkpoint(checkpoint)
+    assert [path.name for path in tmp_path.glob("crawl.json.bloom*")] == ["crawl.json.bloom1"]
+    resumed = Crawler.resume(checkpoint, fetch=fetch, delay=0)
+    assert article_url("Europe") in resumed.visited
+    assert [url for _, _, _, url in resumed.frontier] == [article_url("Europe")]
@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+import pytest
+from date_timeline import DateTimeline, parse_dates
+
+pages = {
+    "Einstein": "Born 14 March 1879, annus mirabilis 1905-06-30, Nobel prize November 9, 1922",
+    "Curie": "Born 7 November 1867, Nobel prizes 1903-12-10 and 1911 December 10",
+    "Langtangen": "Born 3 January 1962, died 2016-02-05",
+}
+
+
+def make_timeline():
+    timeline = DateTimeline()
+    for page, text in pages.items():
+        timeline.add_page(page, text)
+    timeline.commit()
+    return timeline
+
+
+def test_parse_dates():
+    days = parse_dates(["2020/02/29", "2021/02/29", "1905/06/30"])
+    assert days[0] == np.datetime64("2020-02-29")
+    assert np.isnat(days[1])
+    assert days[2] == np.datetime64("1905-06-30")
+    assert parse_dates([]).shape == (0,)
+
+
+def test_sorted_mentions():
+    timeline = make_timeline()
+    assert len(timeline) == 8
+    assert np.all(np.diff(timeline.dates.astype(np.int64)) >= 0)
+    dates, page_ids = timeline.mentions(1900, 1912)
+    assert dates.astype(str).tolist() == ["1903-12-10", "1905-06-30", "1911-12-10"]
+    assert [timeline.pages[i] for i in page_ids] == ["Curie", "Einstein", "Curie"]
+    assert timeline.pages_between("1905", "1911") == ["Einstein"]
+    assert timeline.pages_between("1911-12", "1911-12-11") == ["Curie"]
+    assert timeline.pages_between(2020, 2030) == []
+
+
+def test_histogram():
+    timeline = make_timeline()
+    starts, counts = timeline.histogram("century")
+    assert starts.tolist() == [1800, 1900, 2000]
+    assert counts.tolist() == [2, 5, 1]
+    starts, counts = timeline.histogram("decade")
+    assert starts[0] == 1860 and starts[-1] == 2010
+    assert counts.sum() == len(timeline)
+    assert dict(zip(starts.tolist(), counts.tolist()))[1900] == 2
+    with pytest.raises(ValueError):
+        timeline.histogram("week")
+
+
+def test_save_load_replace(tmp_path):
+    make_timeline().save(tmp_path)
+    timeline = DateTimeline.load(tmp_path)
+    assert isinstance(timeline.dates, np.memmap)
+    assert timeline.pages_between(1860, 1870) == ["Curie"]
+
+    # adding a page again replaces its dates
+    timeline.add_dates("Curie", ["1934/07/04"])
+    timeline.add_page("Serena", "Born September 26, 1981")
+    timeline.save(tmp_path)
+    timeline = DateTimeline.load(tmp_path, mmap=False)
+    assert timeline.pages_between(1860, 1870) == []
+    assert timeline.pages_between(1930, 1990) == ["Curie", "Langtangen", "Serena"]
+    assert len(timeline) == 7
+
+
+def test_timeline_queries_fast():
+    rng = np.random.default_rng(0)
+    n = 2_000_000
+    timeline = DateTimeline()
+    timeline.pages = [f"page {i}" for i in range(1000)]
+    timeline.dates = np.sort(
+        np.datetime64("1000-01-01") + rng.integers(0, 1030 * 365, size=n).astype("timedelta64[D]")
+    )
+    timeline.page_ids = rng.integers(0, 1000, size=n).astype(np.int32)
+
+    tic = time.perf_counter()
+    dates, _ = timeline.mentions(1905, 1911)
+    starts, counts = timeline.histogram("decade")
+    seconds = time.perf_counter() - tic
+    assert counts.sum() == n
+    assert np.all(dates.astype("datetime64[Y]").astype(int) + 1970 >= 1905)
+    # a loose bound, it takes a few tens of milliseconds
+    assert seconds < 1
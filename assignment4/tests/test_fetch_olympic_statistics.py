@@ -1,12 +1,33 @@
 from pathlib import Path
 
+import fetch_olympic_statistics
+import numpy as np
+import pandas as pd
 import pytest
+import requests
+from conftest import available_parsers, country_HTML
 from fetch_olympic_statistics import (
+    MedalChart,
+    build_medal_dataset,
+    clear_country_pages,
+    find_best_countries,
     find_best_country_in_sport,
+    get_country_pages,
+    get_country_stats,
     get_scandi_stats,
     get_sport_stats,
+    gold_totals,
+    load_dataset,
+    medal_matrix,
+    parse_country_page,
+    parse_medal_table,
+    plot_medal_stats,
+    render_medal_charts,
     report_scandi_stats,
+    save_dataset,
+    sport_medals,
 )
+from requesting_urls import set_fetcher
 
 # NOTE: The wiki links are permanent links, meaning they point to snapshots of
 # the corresponding wiki page at a certain time. These links were retrieved in July 2023,
@@ -161,3 +182,300 @@ def test_report_scandi_stats(tmpdir):
     assert (dest_dir / "Sailing_medal_ranking.png").is_file()
     assert (dest_dir / "total_medal_ranking.png").is_file()
     assert (dest_dir / "best_of_sport_by_Gold.md").is_file()
+
+
+class CountingFetcher:
+    def __init__(self, html, pages=None):
+        self.html = html
+        self.pages = pages or {}
+        self.urls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.urls.append(url)
+        response = requests.Response()
+        response._content = self.pages.get(url, self.html).encode("utf-8")
+        response.encoding = "utf-8"
+        response.status_code = 200
+        response.url = url
+        return response
+
+
+@pytest.fixture
+def country_fetcher():
+    fetcher = CountingFetcher(country_HTML)
+    clear_country_pages()
+    previous = set_fetcher(fetcher)
+    yield fetcher
+    set_fetcher(previous)
+    clear_country_pages()
+
+
+@pytest.mark.task42
+@pytest.mark.parametrize("parser", available_parsers)
+def test_parse_country_page(parser):
+    page = parse_country_page(country_HTML, "https://en.wikipedia.org/wiki/Norway_at_the_Olympics", parser)
+    assert page.summer_gold == 61
+    assert page.winter_gold == 148
+    assert page.sports == {
+        "Sailing": {"Gold": 17, "Silver": 11, "Bronze": 4},
+        "Track cycling": {"Gold": 2, "Silver": 0, "Bronze": 1},
+    }
+    assert page.sport_stats("cycling") == {"Gold": 2, "Silver": 0, "Bronze": 1}
+    assert page.sport_stats("Handball") == {"Gold": 0, "Silver": 0, "Bronze": 0}
+
+
+@pytest.mark.task42
+def test_sport_stats_single_fetch(country_fetcher):
+    url = "https://en.wikipedia.org/wiki/Norway_at_the_Olympics"
+    assert get_sport_stats(url, "Sailing") == {"Gold": 17, "Silver": 11, "Bronze": 4}
+    assert get_sport_stats(url, "Cycling") == {"Gold": 2, "Silver": 0, "Bronze": 1}
+    assert get_sport_stats(url, "Archery") == {"Gold": 0, "Silver": 0, "Bronze": 0}
+    assert country_fetcher.urls == [url]
+
+
+@pytest.mark.task42
+def test_country_pages_memo(country_fetcher):
+    url = "https://en.wikipedia.org/wiki/Norway_at_the_Olympics"
+    [page] = get_country_pages([url], parser="html.parser")
+    assert get_country_pages([url]) == [page]
+    assert len(country_fetcher.urls) == 1
+    # another parser parses the page again
+    if "lxml" in available_parsers:
+        get_country_pages([url], parser="lxml")
+        assert len(country_fetcher.urls) == 2
+    clear_country_pages()
+    [again] = get_country_pages([url], parser="html.parser")
+    assert again is not page
+    assert country_fetcher.urls[-1] == url
+    # a run with its own pages leaves the shared ones alone
+    pages = {}
+    get_country_pages(["https://en.wikipedia.org/wiki/Sweden_at_the_Olympics"], pages=pages)
+    assert list(pages) == [("https://en.wikipedia.org/wiki/Sweden_at_the_Olympics", "html.parser")]
+    assert fetch_olympic_statistics._country_pages == {(url, "html.parser"): again}
+
+
+@pytest.mark.task42
+def test_country_pages_parsed_in_processes(country_fetcher):
+    urls = [
+        "https://en.wikipedia.org/wiki/Norway_at_the_Olympics",
+        "https://en.wikipedia.org/wiki/Sweden_at_the_Olympics",
+    ]
+    pages = get_country_pages(urls + urls[:1], workers=2)
+    assert [page.url for page in pages] == urls + urls[:1]
+    assert all(page.summer_gold == 61 for page in pages)
+    assert sorted(country_fetcher.urls) == sorted(urls)
+
+
+medal_table_url = "https://en.wikipedia.org/wiki/All-time_Olympic_Games_medal_table"
+
+medal_table_HTML = """
+<table class="wikitable">
+<tr><th>Team</th><th>No.</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th>
+<th>No.</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th></tr>
+<tr><td><a href="/wiki/Denmark_at_the_Olympics">Denmark</a> (DEN)</td>
+<td>29</td><td>48</td><td>78</td><td>79</td><td>205</td><td>14</td><td>0</td><td>1</td><td>0</td><td>1</td></tr>
+<tr><td><a href="/wiki/Norway_at_the_Olympics">Norway</a> (NOR) [A]</td>
+<td>26</td><td>61</td><td>52</td><td>46</td><td>159</td><td>24</td><td>?</td><td>133</td><td>124</td><td>405</td></tr>
+<tr><td><a href="/wiki/Sweden_at_the_Olympics">Sweden</a> (SWE)</td>
+<td>28</td><td>148</td><td>176</td><td>179</td><td>503</td><td>24</td><td>65</td><td>51</td><td>61</td><td>177</td></tr>
+<tr><td><a href="/wiki/United_States_at_the_Olympics">United States</a> (USA)</td>
+<td>29</td><td>1,061</td><td>830</td><td>738</td><td>2,629</td><td>24</td><td>113</td><td>122</td><td>95</td><td>330</td></tr>
+<tr class="sortbottom"><td>Totals</td><td>32</td><td>5,434</td></tr>
+</table>
+"""
+
+
+@pytest.fixture
+def medal_table_fetcher():
+    fetcher = CountingFetcher(country_HTML, pages={medal_table_url: medal_table_HTML})
+    clear_country_pages()
+    previous = set_fetcher(fetcher)
+    yield fetcher
+    set_fetcher(previous)
+    clear_country_pages()
+
+
+@pytest.mark.task41
+def test_parse_medal_table():
+    countries = parse_medal_table(medal_table_HTML)
+    assert list(countries) == ["Denmark", "Norway", "Sweden", "United States"]
+    assert countries["United States"] == {
+        "url": "https://en.wikipedia.org/wiki/United_States_at_the_Olympics",
+        "medals": {"Summer": 1061, "Winter": 113},
+    }
+    assert countries["Norway"]["medals"] == {"Summer": 61, "Winter": None}
+
+
+@pytest.mark.task41
+def test_country_stats_from_table(medal_table_fetcher):
+    country_dict = get_country_stats(medal_table_url)
+    assert {country: stats["medals"] for country, stats in country_dict.items()} == {
+        "Denmark": {"Summer": 48, "Winter": 0},
+        # the unreadable winter count comes from the country page
+        "Norway": {"Summer": 61, "Winter": 148},
+        "Sweden": {"Summer": 148, "Winter": 65},
+        "United States": {"Summer": 1061, "Winter": 113},
+    }
+    assert medal_table_fetcher.urls == [
+        medal_table_url,
+        "https://en.wikipedia.org/wiki/Norway_at_the_Olympics",
+    ]
+
+
+@pytest.mark.task41
+def test_country_stats_with_sports(medal_table_fetcher):
+    country_dict = get_country_stats(
+        medal_table_url, ["Denmark", "Norway"], source="page", sports=["Sailing", "Cycling", "Archery"]
+    )
+    assert country_dict["Denmark"]["medals"] == {"Summer": 61, "Winter": 148}
+    assert country_dict["Norway"]["sports"] == {
+        "Sailing": {"Gold": 17, "Silver": 11, "Bronze": 4},
+        "Cycling": {"Gold": 2, "Silver": 0, "Bronze": 1},
+        "Archery": {"Gold": 0, "Silver": 0, "Bronze": 0},
+    }
+    # one fetch per page, however many sports
+    assert len(medal_table_fetcher.urls) == 3
+
+    with pytest.raises(ValueError):
+        get_country_stats(medal_table_url, ["Atlantis"])
+    with pytest.raises(ValueError):
+        get_country_stats(medal_table_url, source="wiki")
+
+
+@pytest.mark.task44
+def test_medal_dataset(medal_table_fetcher):
+    dataset = build_medal_dataset(medal_table_url, ["Denmark", "Norway"])
+    assert list(dataset.columns) == ["country", "season", "sport", "medal", "count"]
+    # 2 gold totals and 2 sports x 3 medals per country
+    assert len(dataset) == 2 * (2 + 2 * 3)
+    assert gold_totals(dataset).to_dict("index") == {
+        "Denmark": {"Summer": 61, "Winter": 148},
+        "Norway": {"Summer": 61, "Winter": 148},
+    }
+    cycling = sport_medals(dataset, "cycling")
+    assert cycling.loc["Norway"].to_dict() == {"Gold": 2, "Silver": 0, "Bronze": 1}
+    assert sport_medals(dataset, "Handball").to_dict("index") == {
+        "Denmark": {"Gold": 0, "Silver": 0, "Bronze": 0},
+        "Norway": {"Gold": 0, "Silver": 0, "Bronze": 0},
+    }
+    assert find_best_country_in_sport(cycling) == "None"
+
+
+@pytest.mark.task44
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather"])
+def test_save_load_dataset(medal_table_fetcher, tmp_path, suffix):
+    if suffix != ".csv":
+        pytest.importorskip("pyarrow")
+    dataset = build_medal_dataset(medal_table_url, ["Denmark", "Norway"])
+    path = tmp_path / f"medals{suffix}"
+    save_dataset(dataset, path)
+    loaded = load_dataset(path)
+    assert loaded.astype(str).equals(dataset.astype(str))
+    with pytest.raises(ValueError):
+        save_dataset(dataset, tmp_path / "medals.txt")
+
+
+@pytest.mark.task44
+def test_report_from_saved_dataset(medal_table_fetcher, tmp_path):
+    dataset = build_medal_dataset(medal_table_url, ["Norway", "Sweden", "Denmark"])
+    save_dataset(dataset, tmp_path / "medals.csv")
+    n_fetched = len(medal_table_fetcher.urls)
+
+    report_scandi_stats(medal_table_url, ["Sailing", "Cycling"], tmp_path, dataset=tmp_path / "medals.csv")
+    dest_dir = tmp_path / "olympic_games_results"
+    assert (dest_dir / "Sailing_medal_ranking.png").is_file()
+    assert (dest_dir / "total_medal_ranking.png").is_file()
+    assert "| Sailing | None |" in (dest_dir / "best_of_sport_by_Gold.md").read_text()
+    # everything came from the saved dataset
+    assert len(medal_table_fetcher.urls) == n_fetched
+
+
+@pytest.mark.task44
+def test_report_from_saved_dataset_with_other_countries(medal_table_fetcher, tmp_path):
+    dataset = build_medal_dataset(medal_table_url, ["Norway", "Sweden", "Denmark", "United States"])
+    dataset.loc[(dataset["country"] == "United States") & (dataset["sport"] == "Sailing"), "count"] = 100
+    save_dataset(dataset, tmp_path / "medals.csv")
+
+    report_scandi_stats(medal_table_url, ["Sailing"], tmp_path, dataset=tmp_path / "medals.csv")
+    table = (tmp_path / "olympic_games_results" / "best_of_sport_by_Gold.md").read_text()
+    # the United States are in the file, but not in Scandinavia
+    assert "United States" not in table
+    assert "| Sailing | None |" in table
+
+    save_dataset(dataset[dataset["country"] != "Denmark"], tmp_path / "no_denmark.csv")
+    with pytest.raises(ValueError, match="Denmark"):
+        report_scandi_stats(medal_table_url, ["Sailing"], tmp_path, dataset=tmp_path / "no_denmark.csv")
+
+
+@pytest.mark.task43
+def test_find_best_countries_matches_single():
+    rng = np.random.default_rng(3110)
+    countries = ["Sweden", "Norway", "Denmark", "Finland"]
+    medals = ["Gold", "Silver", "Bronze"]
+    # few distinct counts, so there are plenty of ties and all-zero sports
+    counts = rng.integers(0, 3, size=(200, len(countries), len(medals)))
+    best = find_best_countries(counts, countries, medals=medals)
+    assert best.shape == (200, 3)
+    for sport in range(len(counts)):
+        results = {
+            country: dict(zip(medals, counts[sport, i].tolist())) for i, country in enumerate(countries)
+        }
+        for medal in medals:
+            assert best.loc[sport, medal] == find_best_country_in_sport(results, medal)
+
+
+@pytest.mark.task43
+def test_find_best_countries_edge_cases():
+    assert find_best_countries(np.zeros((2, 0, 3)), []).to_numpy().tolist() == [["None"] * 3] * 2
+    assert find_best_countries(np.zeros((1, 1, 3)), ["Norway"]).loc[0, "Gold"] == "Norway"
+
+
+@pytest.mark.task44
+def test_find_best_countries_from_dataset(medal_table_fetcher):
+    dataset = build_medal_dataset(medal_table_url, ["Denmark", "Norway"])
+    matrix = medal_matrix(dataset, ["Sailing", "Cycling", "Handball"])
+    assert matrix.loc["Sailing", ("Norway", "Gold")] == 17
+    assert find_best_countries(matrix).loc["Handball"].tolist() == ["None", "None", "None"]
+    assert list(medal_matrix(dataset).index) == ["Sailing", "Track cycling"]
+
+
+@pytest.mark.task44
+@pytest.mark.parametrize("workers, fmt", [(None, "png"), (2, "svg")])
+def test_render_medal_charts(tmp_path, workers, fmt):
+    sports = ["Sailing", "Cycling", "Archery"]
+    counts = np.arange(len(sports) * 2 * 3).reshape(len(sports), 2 * 3)
+    matrix = pd.DataFrame(
+        counts,
+        index=pd.Index(sports, name="sport"),
+        columns=pd.MultiIndex.from_product([["Norway", "Sweden"], ["Gold", "Silver", "Bronze"]]),
+    )
+    paths = render_medal_charts(matrix, tmp_path, workers=workers, fmt=fmt)
+    assert paths == [tmp_path / f"{sport}_medal_ranking.{fmt}" for sport in sports]
+    assert all(path.stat().st_size > 0 for path in paths)
+
+    [panels] = render_medal_charts(matrix, tmp_path, fmt=fmt, multi_panel=True)
+    assert panels == tmp_path / f"medal_ranking.{fmt}"
+    assert panels.is_file()
+    [panels] = render_medal_charts(matrix, tmp_path, fmt=fmt, multi_panel=True, shared_ylim=True)
+    assert panels.is_file()
+
+
+@pytest.mark.task44
+def test_medal_chart_scales_each_sport():
+    chart = MedalChart(["Norway", "Sweden"])
+    chart.update("Athletics", [[100, 50, 20], [10, 5, 2]])
+    assert chart.ax.get_ylim() == pytest.approx((0, 105))
+    # a small sport drawn after a big one gets its own scale
+    chart.update("Archery", [[2, 1, 0], [0, 1, 1]])
+    assert chart.ax.get_ylim() == pytest.approx((0, 2.1))
+
+    shared = MedalChart(["Norway", "Sweden"], ymax=100)
+    shared.update("Archery", [[2, 1, 0], [0, 1, 1]])
+    assert shared.ax.get_ylim() == pytest.approx((0, 105))
+
+
+@pytest.mark.task44
+def test_plot_medal_stats(tmp_path):
+    medals = {"Norway": {"Gold": 3, "Silver": 1, "Bronze": 0}, "Sweden": {"Gold": 1, "Silver": 0, "Bronze": 2}}
+    plot_medal_stats(["Norway", "Sweden"], medals, "Sailing", tmp_path)
+    assert (tmp_path / "Sailing_medal_ranking.png").is_file()
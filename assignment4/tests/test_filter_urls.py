@@ -1,7 +1,8 @@
 import warnings
+from pathlib import Path
 
 import pytest
-from filter_urls import find_articles, find_img_src, find_urls
+from filter_urls import find_articles, find_img_src, find_urls, iter_urls
 from requesting_urls import get_html
 
 # Test some random urls
@@ -130,3 +131,46 @@ def test_find_img_src():
         "https://some.jpg",
         "/foo.png",
     }
+
+
+@pytest.mark.task12
+def test_iter_urls_classifies():
+    html = """
+    <a href="/wiki/Norway#History">article</a>
+    <a href="/wiki/Special:Random">special page</a>
+    <a href="https://no.wikipedia.org/wiki/Norge">other language article</a>
+    <a href="//other.host/same-protocol">external</a>
+    <a href="/wiki/Norway">same article again</a>
+    """
+    links = list(iter_urls(html, base_url="https://en.wikipedia.org"))
+    assert links == [
+        ("https://en.wikipedia.org/wiki/Norway", "article"),
+        ("https://en.wikipedia.org/wiki/Special:Random", "same-host"),
+        ("https://no.wikipedia.org/wiki/Norge", "article"),
+        ("https://other.host/same-protocol", "external"),
+    ]
+
+
+@pytest.mark.task12
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_iter_urls_chunks(chunk_size):
+    sample = Path(__file__).parent.parent / "optionalargument.txt"
+    html = sample.read_text(encoding="utf-8")
+    chunks = (html[i : i + chunk_size] for i in range(0, len(html), chunk_size))
+    links = list(iter_urls(chunks))
+    assert len(links) == len({link.url for link in links})
+    assert {link.url for link in links} == find_urls(html)
+    assert {link.url for link in links if link.kind == "article"} == find_articles(html)
+
+
+@pytest.mark.task12
+@pytest.mark.parametrize("chunk_size", [7, 4096])
+def test_extract_from_bytes(chunk_size):
+    sample = Path(__file__).parent.parent / "optionalargument.txt"
+    html = sample.read_text(encoding="utf-8")
+    data = html.encode("utf-8")
+    assert find_urls(data) == find_urls(html)
+    assert find_articles(data) == find_articles(html)
+    assert find_img_src(data) == find_img_src(html)
+    chunks = (data[i : i + chunk_size] for i in range(0, len(data), chunk_size))
+    assert list(iter_urls(chunks)) == list(iter_urls(html))
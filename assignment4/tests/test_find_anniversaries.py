@@ -1,7 +1,10 @@
+import json
 from pathlib import Path
 
+import find_anniversaries
 import pandas as pd
 import pytest
+from conftest import available_parsers
 from find_anniversaries import (
     anniversary_list_to_df,
     anniversary_table,
@@ -22,8 +25,10 @@ sample_HTML = """
 
 
 @pytest.mark.task31
-def test_extract_anniversaries():
-    res = extract_anniversaries(sample_HTML, "October")
+@pytest.mark.parametrize("parser", available_parsers)
+@pytest.mark.parametrize("structural", [True, False])
+def test_extract_anniversaries(parser, structural):
+    res = extract_anniversaries(sample_HTML, "October", parser, structural=structural)
     sol = ["October 1", "October 19"]
 
     assert isinstance(res, list), f"Return type was {type(res)}, expected list"
@@ -33,6 +38,22 @@ def test_extract_anniversaries():
     assert res == sol
 
 
+@pytest.mark.task31
+def test_extract_anniversaries_modes_agree():
+    # a month page like the real ones, with a lot of other markup around
+    days = "\n".join(
+        f'<p><b><a href="/wiki/March_{day}" title="March {day}">March {day}</a></b>: '
+        f'<a href="/wiki/Event_{day}">Event</a> happened ({day}); another one</p>'
+        f'<div class="box"><p>Not an <a href="/wiki/March_{day}">anniversary</a></p></div>'
+        f'<p class="note"><a href="/wiki/March_{day}">March {day}</a></p>'
+        for day in range(1, 32)
+    )
+    html = f"<html><body><table><tr><td>{days}</td></tr></table></body></html>"
+    structural = extract_anniversaries(html, "March", structural=True)
+    assert len(structural) == 31
+    assert structural == extract_anniversaries(html, "March", structural=False)
+
+
 sample_list = [
     "May 19: The creator has birthday! ; Beautiful day\n",
     "December 1: just a beautiful day (always?); Winter is coming (No daylight past 15:00)",
@@ -66,6 +87,23 @@ def test_anniversary_list_to_df():
     assert list(res_df["Event"]) == list(sol_df["Event"])
 
 
+@pytest.mark.task32
+def test_anniversary_list_to_df_categorical(capsys):
+    res_df = anniversary_list_to_df(sample_list, categorical=True)
+    assert isinstance(res_df["Date"].dtype, pd.CategoricalDtype)
+    assert list(res_df["Date"]) == list(anniversary_list_to_df(sample_list)["Date"])
+    assert len(res_df) == 7
+    # diagnostics go to the logger, not stdout
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.task32
+def test_anniversary_list_to_df_empty():
+    res_df = anniversary_list_to_df(["October 1", "November 2: "])
+    assert list(res_df.columns) == ["Date", "Event"]
+    assert len(res_df) == 0
+
+
 months_in_namespace = [
     "January",
     "February",
@@ -104,3 +142,89 @@ def test_anniversary_table(tmpdir):
     assert (dest_dir / "anniversaries_october.md").is_file()
     assert (dest_dir / "anniversaries_november.md").is_file()
     assert (dest_dir / "anniversaries_december.md").is_file()
+
+
+def month_page(month, revision):
+    return (
+        f'<html><head><script>RLCONF={{"wgRevisionId":{revision}}}</script></head><body>'
+        f'<p><b><a href="/wiki/{month}_1">{month} 1</a></b>: Something happened; Another thing</p>'
+        "</body></html>"
+    )
+
+
+@pytest.mark.task33
+def test_incremental_anniversary_table(tmpdir, monkeypatch):
+    revisions = {"January": 1, "February": 2}
+    monkeypatch.setattr(
+        find_anniversaries,
+        "get_html_many",
+        lambda urls: [month_page(url.rsplit("/", 1)[1], revisions[url.rsplit("/", 1)[1]]) for url in urls],
+    )
+    extracted = []
+
+    def counting_extract(html, month, parser=None):
+        extracted.append(month)
+        return extract_anniversaries(html, month, parser)
+
+    monkeypatch.setattr(find_anniversaries, "extract_anniversaries", counting_extract)
+    work_dir = Path(tmpdir)
+    months = ["January", "February"]
+
+    anniversary_table("https://example.org", months, work_dir, incremental=True)
+    assert extracted == months
+    january = work_dir / "tables_of_anniversaries" / "anniversaries_january.md"
+    assert "Another thing" in january.read_text()
+
+    # nothing changed, nothing is parsed
+    anniversary_table("https://example.org", months, work_dir, incremental=True)
+    assert extracted == months
+
+    # only the month with a new revision is rebuilt
+    revisions["February"] = 3
+    anniversary_table("https://example.org", months, work_dir, incremental=True)
+    assert extracted == months + ["February"]
+
+    # another namespace rebuilds every month
+    anniversary_table("https://example.com", months, work_dir, incremental=True)
+    assert extracted == months + ["February"] + months
+
+    # and so does a manifest of another version
+    manifest_path = work_dir / "tables_of_anniversaries" / ".manifest.json"
+    manifest_path.write_text(json.dumps({month: "rev:1" for month in months}))
+    anniversary_table("https://example.com", months, work_dir, incremental=True)
+    assert extracted == months + ["February"] + months * 2
+
+
+@pytest.mark.task33
+@pytest.mark.skipif(len(available_parsers) < 2, reason="needs lxml or html5lib")
+def test_incremental_anniversary_table_other_parser(tmpdir, monkeypatch):
+    monkeypatch.setattr(
+        find_anniversaries, "get_html_many", lambda urls: [month_page(url.rsplit("/", 1)[1], 1) for url in urls]
+    )
+    work_dir = Path(tmpdir)
+    anniversary_table("https://example.org", ["January"], work_dir, parser="html.parser", incremental=True)
+    table = work_dir / "tables_of_anniversaries" / "anniversaries_january.md"
+    table.write_text("stale")
+    anniversary_table("https://example.org", ["January"], work_dir, parser="html.parser", incremental=True)
+    assert table.read_text() == "stale"
+    # built with another parser, so rebuilt
+    anniversary_table("https://example.org", ["January"], work_dir, parser=available_parsers[-1], incremental=True)
+    assert "Another thing" in table.read_text()
+
+
+@pytest.mark.task33
+def test_parallel_anniversary_table(tmpdir, monkeypatch):
+    months = ["January", "February", "March"]
+    monkeypatch.setattr(
+        find_anniversaries,
+        "get_html_many",
+        lambda urls: [month_page(url.rsplit("/", 1)[1], 1) for url in urls],
+    )
+    serial_dir = Path(tmpdir) / "serial"
+    parallel_dir = Path(tmpdir) / "parallel"
+    anniversary_table("https://example.org", months, serial_dir)
+    anniversary_table("https://example.org", months, parallel_dir, workers=2)
+    for month in months:
+        name = f"tables_of_anniversaries/anniversaries_{month.lower()}.md"
+        assert (parallel_dir / name).read_text() == (serial_dir / name).read_text()
+        assert month in (parallel_dir / name).read_text()
@@ -0,0 +1,33 @@
+import pytest
+from conftest import available_parsers
+from html_parsing import PARSER_ENV, get_parser, make_soup, parse_many
+
+def test_get_parser_default(monkeypatch):
+    monkeypatch.delenv(PARSER_ENV, raising=False)
+    assert get_parser() == "html.parser"
+
+
+@pytest.mark.parametrize("parser", available_parsers)
+def test_get_parser_env(monkeypatch, parser):
+    monkeypatch.setenv(PARSER_ENV, parser)
+    assert get_parser() == parser
+    # an explicit argument wins over the environment
+    assert get_parser("html.parser") == "html.parser"
+
+
+def test_get_parser_invalid():
+    with pytest.raises(ValueError):
+        get_parser("selectolax")
+
+
+@pytest.mark.parametrize("parser", available_parsers)
+def test_make_soup(parser):
+    soup = make_soup("<p><b>bold</b> text</p>", parser)
+    assert soup.find("p").get_text() == "bold text"
+
+
+@pytest.mark.parametrize("workers", [None, 1, 2])
+def test_parse_many(workers):
+    htmls = [f"<p>{'x' * i}</p>" for i in range(5)]
+    assert parse_many(len, htmls, workers=workers) == [7 + i for i in range(5)]
+    assert parse_many(pow, [1, 2, 3], [2, 2, 2], workers=workers) == [1, 4, 9]
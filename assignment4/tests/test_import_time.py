@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.absolute() / "benchmarks"))
+
+from bench_import_time import heavy_modules, import_times, loaded_modules  # noqa: E402
+
+# generous, so the test doesn't fail on slow machines,
+# but far below the ~1.5s it took when matplotlib and pandas were imported eagerly
+import_budget_us = 750_000
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["filter_urls", "html_parsing", "find_anniversaries", "fetch_olympic_statistics", "collect_dates"],
+)
+def test_lazy_heavy_imports(module):
+    loaded = loaded_modules(module)
+    assert [name for name in heavy_modules if name in loaded] == []
+
+
+@pytest.mark.parametrize("module", ["find_anniversaries", "fetch_olympic_statistics"])
+def test_import_time_budget(module):
+    total, imports = import_times(module)
+    assert total < import_budget_us, f"importing {module} took {total / 1000:.0f} ms: {imports}"
@@ -0,0 +1,70 @@
+import numpy as np
+from conftest import graph
+from link_graph import LinkGraph
+from wiki_race_challenge import find_path
+
+
+def make_index():
+    index = LinkGraph()
+    for title, links in graph.items():
+        index.add_links(title, links)
+    index.commit()
+    return index
+
+
+def test_csr_arrays():
+    index = make_index()
+    assert len(index) == len(graph)
+    assert index.offsets[-1] == len(index.targets) == sum(len(links) for links in graph.values())
+    for title, links in graph.items():
+        article_id = index.ids[title]
+        assert {index.titles[i] for i in index.successors(article_id)} == links
+        linking = {page for page, page_links in graph.items() if title in page_links}
+        assert {index.titles[i] for i in index.predecessors(article_id)} == linking
+
+
+def test_shortest_path():
+    index = make_index()
+    assert index.shortest_path("Python", "Peace") == ["Python", "Monty Python", "Comedy", "Peace"]
+    assert index.shortest_path("Reptile", "Peace") is None
+
+
+def test_save_load_incremental(tmp_path):
+    make_index().save(tmp_path)
+    index = LinkGraph.load(tmp_path)
+    assert isinstance(index.targets, np.memmap)
+    assert index.shortest_path("Snake", "Peace") is None
+
+    # new pages can be added to a loaded index, and replace existing ones
+    index.add_links("Reptile", {"Europe"})
+    index.add_links("Snake", {"Reptile", "Lizard"})
+    index.save(tmp_path)
+    index = LinkGraph.load(tmp_path)
+    assert index.shortest_path("Snake", "Peace") == ["Snake", "Reptile", "Europe", "Peace"]
+    assert {index.titles[i] for i in index.successors(index.ids["Guido"])} == {"Netherlands"}
+    assert index.successors(index.ids["Lizard"]).size == 0
+
+    footprint = index.memory_footprint()
+    assert footprint["targets"] == index.targets.nbytes
+    assert footprint["titles"] > 0
+
+
+def test_add_page():
+    index = LinkGraph()
+    html = '<a href="/wiki/Peace">peace</a> <a href="/wiki/Help:Contents">help</a> <a href="https://no.wikipedia.org/wiki/Fred">fred</a>'
+    index.add_page("https://en.wikipedia.org/wiki/War", html)
+    index.commit()
+    assert {index.titles[i] for i in index.successors(index.ids["War"])} == {"Peace"}
+
+
+def test_find_path_from_index():
+    index = make_index()
+    start = "https://en.wikipedia.org/wiki/Python"
+    finish = "https://en.wikipedia.org/wiki/Peace"
+    path = find_path(start, finish, index=index)
+    assert path == [
+        start,
+        "https://en.wikipedia.org/wiki/Monty_Python",
+        "https://en.wikipedia.org/wiki/Comedy",
+        finish,
+    ]
@@ -1,7 +1,24 @@
 # Test with no params
+import gzip
+import io
+import os
+import threading
+import time
+
 import pytest
+import requests
 from bs4 import BeautifulSoup
-from requesting_urls import get_html
+from collect_dates import find_dates
+from filter_urls import find_urls
+from requesting_urls import (
+    Fetcher,
+    ResponseCache,
+    SavedPage,
+    get_fetcher,
+    get_html,
+    get_html_many,
+    set_fetcher,
+)
 
 
 @pytest.mark.task11
@@ -51,3 +68,326 @@ def test_get_html_output(tmpdir):
     assert "<html" in rest
     assert "Higher Level Programming" in rest
     assert rest.strip().endswith("</html>")
+
+
+class FakeResponse:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.content = text.encode("utf-8")
+
+
+class FakeFetcher:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append((url, params))
+        return FakeResponse(url, "<html>fake</html>")
+
+
+@pytest.fixture
+def fake_fetcher():
+    fetcher = FakeFetcher()
+    previous = set_fetcher(fetcher)
+    yield fetcher
+    set_fetcher(previous)
+
+
+@pytest.mark.task11
+def test_fetcher_pool_config():
+    with Fetcher(pool_connections=3, pool_maxsize=5, retries=2, timeout=7) as fetcher:
+        adapter = fetcher.session.get_adapter("https://en.wikipedia.org")
+        assert adapter is fetcher.adapter
+        assert adapter._pool_connections == 3
+        assert adapter._pool_maxsize == 5
+        assert adapter.max_retries.total == 2
+        assert fetcher.timeout == 7
+        assert "User-Agent" in fetcher.session.headers
+
+
+@pytest.mark.task11
+def test_get_html_uses_shared_fetcher(fake_fetcher, tmpdir):
+    assert get_fetcher() is fake_fetcher
+    dest = tmpdir.join("output.txt")
+    html = get_html("https://example.com", params={"a": "b"}, output=str(dest))
+    assert html == "<html>fake</html>"
+    assert fake_fetcher.calls == [("https://example.com", {"a": "b"})]
+    assert dest.read() == "https://example.com\n<html>fake</html>"
+
+
+@pytest.mark.task11
+def test_get_html_as_bytes(fake_fetcher, tmpdir):
+    dest = tmpdir.join("output.txt")
+    html = get_html("https://example.com", output=str(dest), as_bytes=True)
+    assert html == b"<html>fake</html>"
+    assert dest.read_binary() == b"https://example.com\n<html>fake</html>"
+
+
+def make_response(url, body=b"<html>cached</html>", status=200, headers=None):
+    response = requests.Response()
+    response._content = body
+    response.raw = io.BytesIO(body)
+    response.status_code = status
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    return response
+
+
+@pytest.fixture
+def cached_fetcher(tmpdir, monkeypatch):
+    fetcher = Fetcher(cache=ResponseCache(tmpdir.join("cache")))
+    sent = []
+
+    def session_get(url, params=None, headers=None, **kwargs):
+        sent.append(headers or {})
+        if headers and headers.get("If-None-Match") == '"v1"':
+            return make_response(url, b"", status=304)
+        return make_response(url, headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(fetcher.session, "get", session_get)
+    fetcher.sent = sent
+    return fetcher
+
+
+@pytest.mark.task11
+def test_cache_fresh_hit(cached_fetcher):
+    url = "https://en.wikipedia.org/w/index.php"
+    first = cached_fetcher.get(url, params={"title": "Main_Page"})
+    second = cached_fetcher.get(url, params={"title": "Main_Page"})
+    assert len(cached_fetcher.sent) == 1
+    assert second.text == first.text == "<html>cached</html>"
+    assert second.from_cache
+    # different params are a different entry
+    cached_fetcher.get(url, params={"title": "Other"})
+    assert len(cached_fetcher.sent) == 2
+
+
+@pytest.mark.task11
+def test_cache_revalidates_stale_entry(cached_fetcher):
+    cached_fetcher.cache.ttl = 0
+    url = "https://en.wikipedia.org/wiki/Studio_Ghibli"
+    cached_fetcher.get(url)
+    response = cached_fetcher.get(url)
+    assert cached_fetcher.sent[1]["If-None-Match"] == '"v1"'
+    assert response.status_code == 200
+    assert response.text == "<html>cached</html>"
+
+
+@pytest.mark.task11
+def test_cache_concurrent_revalidation(cached_fetcher):
+    cached_fetcher.cache.ttl = 0
+    url = "https://en.wikipedia.org/wiki/Studio_Ghibli"
+    cached_fetcher.get(url)
+    errors = []
+
+    def revalidate():
+        try:
+            for _ in range(20):
+                assert cached_fetcher.get(url).text == "<html>cached</html>"
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=revalidate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not list(cached_fetcher.cache.directory.glob("*.tmp"))
+
+
+@pytest.mark.task11
+def test_cache_entry_evicted_after_lookup(cached_fetcher, monkeypatch):
+    url = "https://en.wikipedia.org/wiki/Studio_Ghibli"
+    cached_fetcher.get(url)
+    lookup = cached_fetcher.cache.lookup
+
+    def lookup_then_evict(key):
+        # another thread evicts the entry right after this one looked it up
+        cached = lookup(key)
+        cached[1].unlink()
+        return cached
+
+    monkeypatch.setattr(cached_fetcher.cache, "lookup", lookup_then_evict)
+    assert cached_fetcher.get(url).text == "<html>cached</html>"
+    assert len(cached_fetcher.sent) == 2
+    response, chunks = cached_fetcher.stream(url)
+    assert b"".join(chunks) == b"<html>cached</html>"
+    assert len(cached_fetcher.sent) == 3
+
+
+@pytest.mark.task11
+def test_cache_lru_eviction(tmpdir):
+    cache = ResponseCache(tmpdir, max_bytes=25)
+    for i, url in enumerate(["https://a.org", "https://b.org", "https://c.org"]):
+        response = make_response(url, body=b"x" * 10)
+        key = cache.key(url)
+        cache.store(key, response)
+        if i == 1:
+            # use the first entry, so the second one is least recently used
+            first = cache.lookup(cache.key("https://a.org"))
+            os.utime(first[1], (0, 1e9 + 10))
+            os.utime(cache.lookup(key)[1], (0, 1e9))
+    assert cache.size() <= 25
+    assert cache.lookup(cache.key("https://a.org")) is not None
+    assert cache.lookup(cache.key("https://b.org")) is None
+    assert cache.lookup(cache.key("https://c.org")) is not None
+
+
+@pytest.mark.task11
+def test_cache_counts_size(tmpdir, monkeypatch):
+    cache = ResponseCache(tmpdir, max_bytes=100)
+    scans = []
+    evict = cache._evict
+    monkeypatch.setattr(cache, "_evict", lambda: scans.append(1) or evict())
+    for i in range(10):
+        cache.store(cache.key(f"https://a.org/{i}"), make_response(f"https://a.org/{i}", body=b"x" * 10))
+    # storing the same url again replaces its body
+    cache.store(cache.key("https://a.org/0"), make_response("https://a.org/0", body=b"x" * 10))
+    assert scans == []
+    assert cache._total == cache.size() == 100
+    # going over evicts down to low_water, so the next stores don't scan again
+    for i in range(10, 12):
+        cache.store(cache.key(f"https://a.org/{i}"), make_response(f"https://a.org/{i}", body=b"x" * 10))
+    assert len(scans) == 1
+    assert cache._total == cache.size() == 100
+    cache.clear()
+    assert cache._total == cache.size() == 0
+
+
+@pytest.mark.task11
+def test_output_served_from_cache(cached_fetcher, tmpdir):
+    previous = set_fetcher(cached_fetcher)
+    try:
+        url = "https://uio-in3110.github.io"
+        get_html(url)
+        dest = tmpdir.join("output.txt")
+        html = get_html(url, output=str(dest))
+    finally:
+        set_fetcher(previous)
+    assert len(cached_fetcher.sent) == 1
+    assert dest.read() == f"{url}\n{html}"
+
+
+@pytest.mark.task11
+def test_stream_to_disk(cached_fetcher, tmpdir):
+    previous = set_fetcher(cached_fetcher)
+    try:
+        url = "https://uio-in3110.github.io"
+        dest = tmpdir.join("output.txt")
+        page = get_html(url, output=str(dest), stream=True)
+        # the second time, the body is copied from the cache
+        again = get_html(url, output=str(tmpdir.join("again.txt")), stream=True)
+    finally:
+        set_fetcher(previous)
+    assert isinstance(page, SavedPage)
+    assert len(cached_fetcher.sent) == 1
+    assert dest.read_binary() == f"{url}\n<html>cached</html>".encode()
+    assert tmpdir.join("again.txt").read_binary() == dest.read_binary()
+    assert page.url == again.url == SavedPage(dest).url == url
+    assert page.read_text() == "<html>cached</html>"
+    assert cached_fetcher.get(url).text == "<html>cached</html>"
+
+
+@pytest.mark.task11
+def test_stream_does_not_buffer(tmpdir, monkeypatch):
+    body = b"<html>" + b"x" * 100_000 + b"</html>"
+    response = requests.Response()
+    response.raw = io.BytesIO(body)
+    response.status_code = 200
+    response.url = "https://example.com/big"
+    fetcher = Fetcher()
+    monkeypatch.setattr(fetcher.session, "get", lambda url, **kwargs: response)
+    previous = set_fetcher(fetcher)
+    try:
+        page = get_html("https://example.com/big", output=str(tmpdir.join("big.txt")), stream=True)
+    finally:
+        set_fetcher(previous)
+    # the body was only ever read in chunks, never into response.content
+    assert response._content is False
+    assert page.read_bytes() == body
+
+
+@pytest.mark.task11
+@pytest.mark.parametrize("compress", ["gzip", "zstd"])
+def test_stream_compressed(cached_fetcher, tmpdir, compress):
+    if compress == "zstd":
+        pytest.importorskip("zstandard")
+    previous = set_fetcher(cached_fetcher)
+    try:
+        url = "https://uio-in3110.github.io"
+        dest = tmpdir.join(f"output.txt.{compress}")
+        page = get_html(url, output=str(dest), compress=compress)
+    finally:
+        set_fetcher(previous)
+    assert page.read_text() == "<html>cached</html>"
+    assert SavedPage(dest, compress).url == url
+    if compress == "gzip":
+        # decompresses to the same format as the uncompressed output
+        assert gzip.decompress(dest.read_binary()) == f"{url}\n<html>cached</html>".encode()
+    with pytest.raises(ValueError):
+        page.view()
+
+
+@pytest.mark.task11
+def test_saved_page_view(tmpdir):
+    dest = tmpdir.join("page.txt")
+    dest.write_binary(
+        b"https://en.wikipedia.org/wiki/Page\n"
+        b'<a href="/wiki/Linked_page">born 4 March 1962</a> and <a href="https://example.com">'
+    )
+    with SavedPage(dest) as page:
+        view = page.view()
+        assert bytes(view).startswith(b"<a href")
+        assert find_urls(view) == {"https://en.wikipedia.org/wiki/Linked_page", "https://example.com"}
+        assert find_dates(view) == ["1962/03/04"]
+    assert page._view is None
+
+
+@pytest.mark.task11
+def test_stream_arguments(fake_fetcher, tmpdir):
+    with pytest.raises(ValueError):
+        get_html("https://example.com", stream=True)
+    with pytest.raises(ValueError):
+        get_html("https://example.com", output=str(tmpdir.join("out.txt")), compress="bz2")
+    assert fake_fetcher.calls == []
+
+
+class SlowFetcher:
+    """Fake fetcher recording how many requests run at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def get(self, url, params=None, **kwargs):
+        host = url.split("/")[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.active["all"] = self.active.get("all", 0) + 1
+            for key in (host, "all"):
+                self.peak[key] = max(self.peak.get(key, 0), self.active[key])
+        # later urls finish first, so ordering has to be restored
+        time.sleep(0.05 / (1 + int(url.rsplit("/", 1)[1])))
+        with self.lock:
+            self.active[host] -= 1
+            self.active["all"] -= 1
+        return FakeResponse(url, f"<html>{url}</html>")
+
+
+@pytest.mark.task11
+def test_get_html_many():
+    fetcher = SlowFetcher()
+    previous = set_fetcher(fetcher)
+    urls = [f"https://{host}.org/{i}" for i in range(6) for host in "ab"]
+    try:
+        htmls = get_html_many(urls, concurrency=3, per_host=2)
+    finally:
+        set_fetcher(previous)
+    assert htmls == [f"<html>{url}</html>" for url in urls]
+    assert fetcher.peak["all"] <= 3
+    assert fetcher.peak["a.org"] <= 2
+    assert fetcher.peak["b.org"] <= 2
@@ -0,0 +1,80 @@
+import bz2
+import gzip
+import json
+
+import pytest
+from conftest import country_HTML
+from fetch_olympic_statistics import parse_country_page
+from filter_urls import find_articles
+from find_anniversaries import extract_anniversaries
+from wiki_dump import iter_dump, wikitext_to_html
+
+xml_dump = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/" version="0.10">
+  <siteinfo><sitename>Wikipedia</sitename></siteinfo>
+  <page>
+    <title>Wikipedia:Selected anniversaries/March</title>
+    <ns>4</ns>
+    <revision>
+      <text>{{Selected anniversaries header}}
+'''[[March 1]]''': [[Frédéric Chopin]] is born (1810); the [[Battle of Adwa|battle]] ends
+'''[[March 2]]''': Something else happened
+* a list item
+== A heading ==
+Some [[File:Picture.jpg|picture]] text</text>
+    </revision>
+  </page>
+  <page>
+    <title>Peace</title>
+    <ns>0</ns>
+    <revision><text>Old text</text></revision>
+    <revision><text>''Peace'' is the absence of [[war]] and [[Conflict (disambiguation)#Top|conflict]].</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+def write(path, data):
+    opener = {".bz2": bz2.open, ".gz": gzip.open}.get(path.suffix, open)
+    with opener(path, "wb") as f:
+        f.write(data.encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("name", ["dump.xml", "dump.xml.bz2", "dump.xml.gz"])
+def test_iter_xml_dump(tmp_path, name):
+    path = write(tmp_path / name, xml_dump)
+    pages = dict(iter_dump(path))
+    assert list(pages) == ["Wikipedia:Selected anniversaries/March", "Peace"]
+
+    articles = find_articles(pages["Peace"])
+    assert articles == {
+        "https://en.wikipedia.org/wiki/war",
+        "https://en.wikipedia.org/wiki/Conflict_(disambiguation)",
+    }
+    assert "Old text" not in pages["Peace"]
+
+    anniversaries = extract_anniversaries(pages["Wikipedia:Selected anniversaries/March"], "March")
+    assert anniversaries == [
+        "March 1: Frédéric Chopin is born (1810); the battle ends",
+        "March 2: Something else happened",
+    ]
+
+
+def test_iter_html_dump(tmp_path):
+    records = [
+        {"name": "Norway at the Olympics", "article_body": {"html": country_HTML}},
+        {"name": "Peace", "article_body": {"html": '<p><a href="/wiki/War">war</a></p>'}},
+    ]
+    path = write(tmp_path / "dump.ndjson.gz", "\n".join(json.dumps(r) for r in records) + "\n")
+    pages = list(iter_dump(path))
+    assert [title for title, _ in pages] == ["Norway at the Olympics", "Peace"]
+    page = parse_country_page(pages[0][1])
+    assert page.summer_gold == 61
+
+    only_peace = list(iter_dump(path, titles={"Peace"}))
+    assert only_peace == [("Peace", records[1]["article_body"]["html"])]
+
+
+def test_wikitext_to_html():
+    html = wikitext_to_html("'''[[Oslo|The capital]]''' & ''[[Bergen]]''\n{{Infobox|a={{nested}}}}\n")
+    assert html == '<p><b><a href="/wiki/Oslo">The capital</a></b> &amp; <i><a href="/wiki/Bergen">Bergen</a></i></p>'
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+import pytest
+from conftest import graph
+from requesting_urls import set_fetcher
+from wiki_race_challenge import (
+    SearchStats,
+    article_title,
+    article_url,
+    bidirectional_search,
+    live_backward,
+    race,
+)
+
+def forward(titles):
+    return {title: graph.get(title, set()) for title in titles}
+
+
+def backward(titles):
+    return {
+        title: {page for page, links in graph.items() if title in links}
+        for title in titles
+    }
+
+
+@pytest.mark.parametrize(
+    "start, finish, length",
+    [
+        ("Python", "Peace", 3),
+        ("Python", "Europe", 3),
+        ("Guido", "Peace", 3),
+        ("Peace", "War", 1),
+        ("Python", "Python", 0),
+    ],
+)
+def test_bidirectional_search(start, finish, length):
+    stats = SearchStats()
+    path = bidirectional_search(start, finish, forward, backward, stats=stats)
+    assert path[0] == start
+    assert path[-1] == finish
+    assert len(path) - 1 == length
+    for page, next_page in zip(path, path[1:]):
+        assert next_page in graph[page]
+
+
+def test_bidirectional_search_no_path():
+    assert bidirectional_search("Reptile", "Peace", forward, backward) is None
+    assert bidirectional_search("Python", "Peace", forward, backward, max_depth=2) is None
+
+
+def test_article_url_roundtrip():
+    url = "https://en.wikipedia.org/wiki/Python_(programming_language)"
+    assert article_title(url) == "Python (programming language)"
+    assert article_url(article_title(url)) == url
+    assert article_title("https://en.wikipedia.org/wiki/Ir%C3%A8ne_Joliot-Curie") == "Irène Joliot-Curie"
+
+
+def test_race():
+    start = "https://en.wikipedia.org/wiki/Python"
+    finish = "https://en.wikipedia.org/wiki/Peace"
+    path, stats = race(start, finish, expand_forward=forward, expand_backward=backward)
+    assert path[0] == start
+    assert path[-1] == finish
+    assert len(path) == 4
+    assert all(url.startswith("https://en.wikipedia.org/wiki/") for url in path)
+    assert stats.nodes_expanded > 0
+    assert stats.seconds >= 0
+
+
+class BacklinksFetcher:
+    """Fake MediaWiki API, giving the backlinks of every title 2 at a time"""
+
+    def __init__(self, backlinks):
+        self.backlinks = backlinks
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(dict(params))
+        titles = self.backlinks.get(params["bltitle"])
+        if titles is None:
+            data = {"error": {"code": "invalidtitle", "info": "Bad title"}}
+        else:
+            offset = int(params.get("blcontinue", 0))
+            data = {"query": {"backlinks": [{"title": title} for title in titles[offset : offset + 2]]}}
+            if offset + 2 < len(titles):
+                data["continue"] = {"blcontinue": str(offset + 2), "continue": "-||"}
+        return SimpleNamespace(json=lambda: data)
+
+
+@pytest.fixture
+def backlinks_fetcher():
+    fetcher = BacklinksFetcher({"Peace": ["War", "Dove", "Treaty", "Nobel", "Pax"], "War": []})
+    previous = set_fetcher(fetcher)
+    yield fetcher
+    set_fetcher(previous)
+
+
+def test_live_backward_continuation(backlinks_fetcher):
+    stats = SearchStats()
+    expand = live_backward(stats, workers=2)
+    assert expand(["Peace", "War"]) == {"Peace": {"War", "Dove", "Treaty", "Nobel", "Pax"}, "War": set()}
+    assert stats.pages_fetched == 4
+    assert [call.get("blcontinue") for call in backlinks_fetcher.calls[:3]] == [None, "2", "4"]
+
+    # stops following the continuation at max_backlinks
+    capped = live_backward(SearchStats(), max_backlinks=3)
+    assert capped(["Peace"]) == {"Peace": {"War", "Dove", "Treaty", "Nobel"}}
+
+
+def test_live_backward_api_error(backlinks_fetcher):
+    expand = live_backward(SearchStats())
+    with pytest.raises(RuntimeError, match="invalidtitle"):
+        expand(["Nonexistent"])
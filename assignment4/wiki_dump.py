@@ -0,0 +1,152 @@
+"""
+Reading wikipedia dumps, as an offline alternative to get_html
+
+Two kinds of dumps are supported, plain or compressed with bz2 or gzip:
+
+- MediaWiki XML exports (pages-articles.xml), read incrementally with
+  `xml.etree.ElementTree.iterparse`. These contain wikitext, which is turned
+  into just enough html for the scrapers (links, bold text and paragraphs),
+  see `wikitext_to_html`.
+- HTML dumps with one JSON record per line (like the Wikimedia Enterprise
+  dumps), with the rendered html of each article.
+
+Either way, `iter_dump` yields (title, html) records that can go straight into
+find_articles, extract_anniversaries or parse_country_page:
+
+    for title, html in iter_dump("enwiki-pages-articles.xml.bz2"):
+        articles = find_articles(html)
+"""
+from __future__ import annotations
+
+import bz2
+import gzip
+import html as html_lib
+import json
+import re
+from pathlib import Path
+from typing import IO, Iterator
+from urllib.parse import quote
+from xml.etree import ElementTree
+
+# [[Target]], [[Target|label]] and [[Target#Section|label]]
+wikilink_pattern = re.compile(r"\[\[([^\[\]|#]*)(?:#[^\[\]|]*)?(?:\|([^\[\]]*))?\]\]")
+bold_pattern = re.compile(r"'''(.+?)'''")
+italic_pattern = re.compile(r"''(.+?)''")
+# innermost {{templates}}, removed until none are left
+template_pattern = re.compile(r"\{\{[^{}]*\}\}")
+
+# lines that aren't running text: lists, headings, tables, ...
+non_paragraph_starts = ("*", "#", "=", "{|", "|", "!", ":", ";")
+
+
+def open_dump(path: str | Path) -> IO[bytes]:
+    """Open a dump file for reading bytes, decompressing .bz2 and .gz on the fly"""
+    path = Path(path)
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _wikilink_to_html(match: re.Match) -> str:
+    target, label = match.group(1).strip(), match.group(2)
+    if label is None:
+        label = match.group(1)
+    # the text was escaped before the links were converted
+    target = html_lib.unescape(target)
+    href = "/wiki/" + quote(target.replace(" ", "_"), safe="/:@!$()*,;'~")
+    return f'<a href="{html_lib.escape(href)}">{label}</a>'
+
+
+def wikitext_to_html(text: str) -> str:
+    """Turn wikitext into minimal html
+
+    Internal links become <a href="/wiki/...">, bold and italic text become
+    <b> and <i>, and every line of running text becomes a <p>.
+    Templates are dropped, and tables, lists and headings are left out.
+
+    arguments:
+        text (str): wikitext of a page
+    returns:
+        html (str): the html
+    """
+    text = html_lib.escape(text, quote=False)
+    while True:
+        text, n = template_pattern.subn("", text)
+        if not n:
+            break
+
+    paragraphs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(non_paragraph_starts):
+            continue
+        line = wikilink_pattern.sub(_wikilink_to_html, line)
+        line = bold_pattern.sub(r"<b>\1</b>", line)
+        line = italic_pattern.sub(r"<i>\1</i>", line)
+        paragraphs.append(f"<p>{line}</p>")
+    return "\n".join(paragraphs)
+
+
+def _local_name(tag: str) -> str:
+    """Tag name without the {namespace}"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_xml_dump(file: IO[bytes]) -> Iterator[tuple[str, str]]:
+    """Yield (title, wikitext) for every page of a MediaWiki XML export
+
+    The file is read incrementally, and each page is cleared from the tree
+    once it has been yielded, so memory use doesn't grow with the dump.
+    """
+    root = None
+    for event, elem in ElementTree.iterparse(file, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or _local_name(elem.tag) != "page":
+            continue
+        title = ""
+        text = ""
+        for child in elem.iter():
+            name = _local_name(child.tag)
+            if name == "title":
+                title = child.text or ""
+            elif name == "text":
+                # the last revision in the page is the newest
+                text = child.text or ""
+        yield title, text
+        elem.clear()
+        root.clear()
+
+
+def iter_html_dump(file: IO[bytes]) -> Iterator[tuple[str, str]]:
+    """Yield (title, html) for every record of an HTML dump with one JSON object per line
+
+    Records look like {"name": "Title", "article_body": {"html": "..."}}.
+    """
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        yield record["name"], record["article_body"]["html"]
+
+
+def iter_dump(path: str | Path, titles: set[str] | None = None) -> Iterator[tuple[str, str]]:
+    """Yield (title, html) records from a wikipedia dump
+
+    arguments:
+        path (str | Path): the dump file. Files with .ndjson or .jsonl in their name are
+            read as HTML dumps, anything else as MediaWiki XML. May end in .bz2 or .gz.
+        titles (set[str], optional): only yield the pages with these titles
+    yields:
+        title, html (tuple[str, str]): title and html of each page, in dump order
+    """
+    path = Path(path)
+    is_html_dump = any(suffix in {".ndjson", ".jsonl"} for suffix in path.suffixes)
+    with open_dump(path) as file:
+        records = iter_html_dump(file) if is_html_dump else iter_xml_dump(file)
+        for title, content in records:
+            if titles is not None and title not in titles:
+                continue
+            yield title, content if is_html_dump else wikitext_to_html(content)
@@ -1,15 +1,267 @@
 """
 Bonus task
+
+Finding the shortest path of links between two wikipedia articles,
+with a bidirectional breadth-first search
 """
 from __future__ import annotations
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+from urllib.parse import quote, unquote, urlparse
+
+from filter_urls import find_articles
+from requesting_urls import get_fetcher, get_html_many
+
+if TYPE_CHECKING:
+    from link_graph import LinkGraph
+
+base_url = "https://en.wikipedia.org"
+
+# Expands a frontier level: takes a list of article titles,
+# and returns the set of neighbouring titles for each of them
+Expander = Callable[[list[str]], "dict[str, set[str]]"]
+
+
+@dataclass
+class SearchStats:
+    """How much work a search took
+
+    nodes_expanded (int): number of articles whose links (or backlinks) were looked up
+    pages_fetched (int): number of http requests made
+    seconds (float): wall-clock time of the search
+    """
+
+    nodes_expanded: int = 0
+    pages_fetched: int = 0
+    seconds: float = 0.0
+
+
+def article_title(url: str) -> str:
+    """Title of the article at a wikipedia url, e.g. '.../wiki/Star_Wars' -> 'Star Wars'"""
+    path = urlparse(url).path
+    return unquote(path.split("/wiki/", 1)[1]).replace("_", " ")
+
+
+def article_url(title: str) -> str:
+    """Wikipedia url of the article with the given title"""
+    return f"{base_url}/wiki/" + quote(title.replace(" ", "_"), safe="/:@!$()*,;'~")
+
+
+def live_forward(stats: SearchStats, workers: int = 8) -> Expander:
+    """Expander following the links on the live articles, fetched concurrently"""
+
+    def expand(titles: list[str]) -> dict[str, set[str]]:
+        htmls = get_html_many([article_url(title) for title in titles], concurrency=workers)
+        stats.pages_fetched += len(titles)
+        host = urlparse(base_url).netloc
+        return {
+            title: {
+                article_title(article)
+                for article in find_articles(html, base_url=base_url)
+                if urlparse(article).netloc == host
+            }
+            for title, html in zip(titles, htmls)
+        }
+
+    return expand
+
+
+def live_backward(stats: SearchStats, workers: int = 8, max_backlinks: int = 5000) -> Expander:
+    """Expander following 'What links here' backwards, with the MediaWiki API
+
+    The API gives at most 500 backlinks per request, and the rest are fetched by
+    following its `continue` parameters, until `max_backlinks` have been found.
+    For articles with more backlinks than that, only the first ones are used,
+    and the path found may be longer than the shortest one.
+    Raises RuntimeError if the API answers with an error.
+    """
+
+    def backlinks(title: str) -> tuple[set[str], int]:
+        params = {
+            "action": "query",
+            "list": "backlinks",
+            "bltitle": title,
+            "blnamespace": 0,
+            "bllimit": "max",
+            "format": "json",
+        }
+        titles = set()
+        n_requests = 0
+        while True:
+            data = get_fetcher().get(f"{base_url}/w/api.php", params=params).json()
+            n_requests += 1
+            if "error" in data or "query" not in data:
+                error = data.get("error", {})
+                raise RuntimeError(
+                    f"MediaWiki API error for the backlinks of {title!r}: "
+                    f"{error.get('code', 'no query in response')}: {error.get('info', data)}"
+                )
+            titles.update(page["title"] for page in data["query"]["backlinks"])
+            if "continue" not in data or len(titles) >= max_backlinks:
+                return titles, n_requests
+            params = {**params, **data["continue"]}
+
+    def expand(titles: list[str]) -> dict[str, set[str]]:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(backlinks, titles))
+        stats.pages_fetched += sum(n_requests for _, n_requests in results)
+        return {title: linking for title, (linking, _) in zip(titles, results)}
+
+    return expand
+
+
+def bidirectional_search(
+    start: str,
+    finish: str,
+    expand_forward: Expander,
+    expand_backward: Expander,
+    max_depth: int = 6,
+    stats: SearchStats | None = None,
+) -> list[str] | None:
+    """Shortest path from `start` to `finish` with a bidirectional breadth-first search
+
+    One whole frontier level is expanded at a time, always on the side with the
+    smaller frontier, and the search stops at the first level where the two
+    searches meet.
+
+    Arguments:
+      start (str): node to start from
+      finish (str): node to stop at
+      expand_forward (Expander): gives the nodes each node links to
+      expand_backward (Expander): gives the nodes linking to each node
+      max_depth (int): longest path (in links) to look for
+      stats (SearchStats, optional): counts the expanded nodes
+
+    Returns:
+      path (list[str] | None): the nodes from `start` to `finish`, None if there is no path within max_depth
+    """
+    if stats is None:
+        stats = SearchStats()
+    if start == finish:
+        return [start]
+
+    # node -> (parent, depth) for each direction
+    forward = {start: (None, 0)}
+    backward = {finish: (None, 0)}
+    forward_frontier = [start]
+    backward_frontier = [finish]
+    forward_depth = backward_depth = 0
+
+    while forward_frontier and backward_frontier and forward_depth + backward_depth < max_depth:
+        if len(forward_frontier) <= len(backward_frontier):
+            expand, seen, other, frontier = expand_forward, forward, backward, forward_frontier
+            forward_depth += 1
+            depth = forward_depth
+        else:
+            expand, seen, other, frontier = expand_backward, backward, forward, backward_frontier
+            backward_depth += 1
+            depth = backward_depth
+
+        neighbours = expand(frontier)
+        stats.nodes_expanded += len(frontier)
+
+        next_frontier = []
+        meeting = None
+        for node in frontier:
+            for neighbour in sorted(neighbours.get(node, ())):
+                if neighbour in seen:
+                    continue
+                seen[neighbour] = (node, depth)
+                next_frontier.append(neighbour)
+                # the first level where the searches meet has the shortest path,
+                # through the meeting node closest to the other end
+                if neighbour in other and (meeting is None or other[neighbour][1] < other[meeting][1]):
+                    meeting = neighbour
+
+        if meeting is not None:
+            return _join_paths(meeting, forward, backward)
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _join_paths(meeting: str, forward: dict, backward: dict) -> list[str]:
+    """Follow the parents from the meeting node back to the start and on to the finish"""
+    path = []
+    node = meeting
+    while node is not None:
+        path.append(node)
+        node = forward[node][0]
+    path.reverse()
+    node = backward[meeting][0]
+    while node is not None:
+        path.append(node)
+        node = backward[node][0]
+    return path
+
+
+def race(
+    start: str,
+    finish: str,
+    workers: int = 8,
+    max_depth: int = 6,
+    expand_forward: Expander | None = None,
+    expand_backward: Expander | None = None,
+    index: LinkGraph | None = None,
+) -> tuple[list[str], SearchStats]:
+    """Find the shortest path of links between two articles, and how much work it took
+
+    Arguments:
+      start (str): wikipedia article URL to start from
+      finish (str): wikipedia article URL to stop at
+      workers (int): number of pages fetched concurrently for each frontier
+      max_depth (int): longest path (in links) to look for
+      expand_forward (Expander, optional): link lookup, live articles by default
+      expand_backward (Expander, optional): backlink lookup, live 'What links here' by default
+      index (LinkGraph, optional): answer from a local link index instead, without fetching anything
+
+    Returns:
+      urls, stats (tuple[list[str], SearchStats]): the path, see find_path, and the search statistics
+    """
+    stats = SearchStats()
+    if index is not None:
+        index_forward, index_backward = index.expanders()
+        expand_forward = expand_forward or index_forward
+        expand_backward = expand_backward or index_backward
+    if expand_forward is None:
+        expand_forward = live_forward(stats, workers)
+    if expand_backward is None:
+        expand_backward = live_backward(stats, workers)
+
+    tic = time.perf_counter()
+    titles = bidirectional_search(
+        article_title(start),
+        article_title(finish),
+        expand_forward,
+        expand_backward,
+        max_depth=max_depth,
+        stats=stats,
+    )
+    stats.seconds = time.perf_counter() - tic
+
+    if titles is None:
+        raise ValueError(f"No path from {start} to {finish} in at most {max_depth} links")
+
+    path = [article_url(title) for title in titles]
+    path[0] = start
+    path[-1] = finish
+    return path, stats
+
 
-def find_path(start: str, finish: str) -> list[str]:
+def find_path(start: str, finish: str, index: LinkGraph | None = None) -> list[str]:
     """Find the shortest path from `start` to `finish`
 
     Arguments:
       start (str): wikipedia article URL to start from
       finish (str): wikipedia article URL to stop at
+      index (LinkGraph, optional): local link index to search in, instead of the live wikipedia
 
     Returns:
       urls (list[str]):
@@ -19,9 +271,11 @@ def find_path(start: str, finish: str) -> list[str]:
         All items of the list should be URLs for wikipedia articles.
         Each article should have a direct link to the next article in the list.
     """
-    raise NotImplementedError("remove me to begin task")
-    path = ["..."]
-    ...
+    path, stats = race(start, finish, index=index)
+    print(
+        f"Found a path of {len(path) - 1} links: expanded {stats.nodes_expanded} articles, "
+        f"fetched {stats.pages_fetched} pages in {stats.seconds:.1f}s"
+    )
     assert path[0] == start
     assert path[-1] == finish
     return path
@@ -30,4 +284,5 @@ def find_path(start: str, finish: str) -> list[str]:
 if __name__ == "__main__":
     start = "https://en.wikipedia.org/wiki/Python_(programming_language)"
     finish = "https://en.wikipedia.org/wiki/Peace"
-    find_path(start, finish)
+    for url in find_path(start, finish):
+        print(url)